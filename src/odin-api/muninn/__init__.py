@@ -1,10 +1,19 @@
 """Client code specific constants."""
 
-from typing import Dict
+import asyncio
+from typing import Any, BinaryIO, Coroutine, Dict, Optional, Union
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from baseline.utils import get_console_logger
 from muninn.auth import *
 from muninn.version import *
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 ODIN_API_LOGGER = get_console_logger('odin', env_key='ODIN_LOG_LEVEL')
 ODIN_URL = os.environ.get('ODIN_URL', 'localhost')
 ODIN_PORT = os.environ.get('ODIN_PORT', 9003)
@@ -28,18 +37,25 @@ class APIStatus:
 
 
 
+def run_async(coro: Coroutine) -> Any:
+    """Run a coroutine from a CLI on a fresh event loop, a `uvloop` one when it is installed.
+
+    :param coro: The coroutine to run
+    :return: The result of the coroutine
+    """
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return asyncio.run(coro)
+
+
 def encode_path(path: str) -> str:
     """Encode a path from `/` to `__`
 
     :param path: A path to encode
     :return: An encoded vector
     """
-    vec = []
-    while path:
-        head, tail = os.path.split(path)
-        vec.append(tail)
-        path = head
-    return '__'.join(filter(lambda x: x, vec[::-1]))
+    # On windows `os.sep` is `\\`, which is also a separator
+    return '__'.join(part for part in path.replace(os.sep, '/').split('/') if part)
 
 
 class HttpClient:
@@ -55,13 +71,32 @@ class HttpClient:
         else:
             self.url = url
 
-        username = username
-        password = password
+        # All calls go through one session so the connection to the server is reused
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=16, max_retries=Retry(total=3, backoff_factor=0.1))
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
         if username is not None and password is not None:
             self.jwt_token = authenticate(self.url, username, password)
         else:
             self.jwt_token = jwt_token
 
+    @property
+    def jwt_token(self) -> Optional[str]:
+        return self._jwt_token
+
+    @jwt_token.setter
+    def jwt_token(self, jwt_token: Optional[str]) -> None:
+        """Set the token and the `Authorization` header sent on every request
+
+        :param jwt_token: The JWT token
+        """
+        self._jwt_token = jwt_token
+        if jwt_token is None:
+            self._session.headers.pop('Authorization', None)
+        else:
+            self._session.headers['Authorization'] = f'Bearer {jwt_token}'
+
     def schedule_pipeline(self, work: str, context: Dict={}) -> Dict:
         """Request the status over HTTP
         :param url: the base URL
@@ -70,9 +105,8 @@ class HttpClient:
         """
         job = encode_path(work)
 
-        response = requests.post(
+        response = self._session.post(
             f'{self.url}/v1/pipelines',
-            headers={'Authorization': f'Bearer {self.jwt_token}'},
             json={"pipeline": {"job": job}, "context": context},
         )
         if response.status_code == 401:
@@ -88,17 +122,15 @@ class HttpClient:
         :param name: The name of the job you want to create
         """
         job = encode_path(name)
-        response = requests.post(
-            f"{self.url}/v1/jobs", headers={"Authorization": f"Bearer {self.jwt_token}"}, json={"job": {"name": job}}
-        )
+        response = self._session.post(f"{self.url}/v1/jobs", json={"job": {"name": job}})
         if response.status_code == 401:
             raise ValueError("Invalid Login")
         results = response.json()
         return results
 
     def request_job(self, name: str) -> Dict:
-        name = name.replace('/', '__')
-        response = requests.get(f'{self.url}/v1/jobs/{name}')
+        name = encode_path(name)
+        response = self._session.get(f'{self.url}/v1/jobs/{name}')
         results = response.json()
         return results
 
@@ -108,7 +140,7 @@ class HttpClient:
         :param url: The base URL
         :param resource: The resource ID
         """
-        response = requests.get(f'{self.url}/v1/resources/{resource}/events')
+        response = self._session.get(f'{self.url}/v1/resources/{resource}/events')
         if response.status_code == 401:
             raise ValueError("Invalid login")
         results = response.json()
@@ -120,7 +152,7 @@ class HttpClient:
         :param url: The base URL
         :param resource: The resource ID
         """
-        response = requests.get(f'{self.url}/v1/resources/{resource}/logs')
+        response = self._session.get(f'{self.url}/v1/resources/{resource}/logs')
         if response.status_code == 401:
             raise ValueError("Invalid login")
         results = response.json()
@@ -132,29 +164,30 @@ class HttpClient:
         :param url: The base URL
         :param resource: The resource ID
         """
-        response = requests.get(f'{self.url}/v1/resources/{resource}/data')
+        response = self._session.get(f'{self.url}/v1/resources/{resource}/data')
         results = response.json()
         return results
 
     def request_cluster_hw_status(self) -> Dict:
         """Request the status over HTTP
         """
-        response = requests.get(f'{self.url}/v1/nodes')
+        response = self._session.get(f'{self.url}/v1/nodes')
         nodes = response.json()['nodes']
         return nodes
 
-    def push_file(self, job: str, file_name: str, file_contents: str) -> Dict:
+    def push_file(self, job: str, file_name: str, file_contents: Union[str, bytes, BinaryIO]) -> Dict:
         """Push a file to update a pipeline.
 
         :param job: The job definition that will be updated
         :param file_name: The name to save the file as on the remove server
-        :param file_contents: The content of the file we want to upload
+        :param file_contents: The content of the file we want to upload, bytes are sent as is and
+            a file opened in binary mode is streamed
         """
         job = encode_path(job)
-        response = requests.post(
+        response = self._session.post(
             f'{self.url}/v1/jobs/{job}/files/{file_name}',
             data=file_contents,
-            headers={'Content-Type': 'text/plain', 'Authorization': f'Bearer {self.jwt_token}'},
+            headers={'Content-Type': 'application/octet-stream'},
         )
         if response.status_code == 401:
             raise ValueError("Invalid login")
@@ -169,9 +202,8 @@ class HttpClient:
         :param purge_fs: Should we remove pipeline file system artifacts?
         """
 
-        response = requests.delete(
+        response = self._session.delete(
             f'{self.url}/v1/pipelines/{work}',
-            headers={'Authorization': f'Bearer {self.jwt_token}'},
             params={'db': purge_db, 'fs': purge_fs},
         )
         if response.status_code == 401:
@@ -186,12 +218,12 @@ class HttpClient:
         :param columns: A set of columns to include in the output
         :param all_cols: Should we just show all columns, If true then columns in ignored
         """
-        response = requests.get(f'{self.url}/v1/pipelines?q={work}')
+        response = self._session.get(f'{self.url}/v1/pipelines?q={work}')
         results = response.json()['pipelines']
         return results
 
     def request_users(self):
-        response = requests.get(f'{self.url}/v1/users')
+        response = self._session.get(f'{self.url}/v1/users')
         results = response.json()['users']
         return results
 
@@ -201,6 +233,6 @@ class HttpClient:
 
         :return:
         """
-        response = requests.get(f'{self.url}/v1/app')
+        response = self._session.get(f'{self.url}/v1/app')
         return response.json()
 
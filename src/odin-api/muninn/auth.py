@@ -1,10 +1,14 @@
 """Auth utils"""
 import os
+import time
+import json
+import base64
+from typing import Callable, TypeVar
 import requests
-from prompt_toolkit import prompt
 from baseline.utils import str_file, get_console_logger
 
 ODIN_AUTH_LOGGER = get_console_logger('odin', env_key='ODIN_LOG_LEVEL')
+T = TypeVar('T')
 
 
 @str_file(token_file='r')
@@ -33,12 +37,33 @@ def authenticate(url, username, passwd):
             raise ex
 
 
+def is_token_expired(token: str, leeway: int = 30) -> bool:
+    """Check the `exp` claim of a JWT token locally so we don't send a token the server will reject.
+
+    The signature isn't checked, that is up to the server. Tokens we can't read are treated as
+    valid and left to the server too.
+
+    :param token: The JWT token
+    :param leeway: How many seconds before `exp` to treat the token as expired
+    :return: `True` if the token has expired
+    """
+    try:
+        payload = token.strip().split('.')[1]
+        # JWTs use unpadded base64url
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return claims['exp'] <= time.time() + leeway
+    except (IndexError, KeyError, TypeError, ValueError):
+        return False
+
+
 @str_file(token_file='w')
 def _write_jwt_file(token_file, token):
     token_file.write(token)
 
 
-def get_jwt_token(url: str, token_file: str = None, username: str = None, passwd: str = None) -> str:
+def get_jwt_token(
+    url: str, token_file: str = None, username: str = None, passwd: str = None, force_refresh: bool = False
+) -> str:
     """Get a JWT token to send to the server
 
     1. If user and passwd are given, authenticate, and save to `token_file` if not None
@@ -49,6 +74,7 @@ def get_jwt_token(url: str, token_file: str = None, username: str = None, passwd
     :param token_file: An optional path to a file containing a JWT token
     :param username: An optional username
     :param passwd: An optional passwd
+    :param force_refresh: Ignore the token in `token_file` and authenticate for a new one
     :return: A JWT token we can send
     """
 
@@ -57,9 +83,15 @@ def get_jwt_token(url: str, token_file: str = None, username: str = None, passwd
         _write_jwt_file(token_file, token)
         return token
 
-    if os.path.isfile(token_file):
+    if not force_refresh and os.path.isfile(token_file):
         token = _read_jwt_token_from_file(token_file)
-        return token
+        if not is_token_expired(token):
+            return token
+        # The server would reject it so get a new one now instead of failing a request first
+        os.remove(token_file)
+
+    # prompt_toolkit is slow to import and only needed when we have to ask for creds
+    from prompt_toolkit import prompt  # pylint: disable=import-outside-toplevel
 
     if not username:
         username = prompt('odin username: ', is_password=False)
@@ -69,3 +101,28 @@ def get_jwt_token(url: str, token_file: str = None, username: str = None, passwd
     token = authenticate(url, username, passwd)
     _write_jwt_file(token_file, token)
     return token
+
+
+def call_with_jwt_token(
+    call: Callable[[str], T], url: str, token_file: str = None, username: str = None, passwd: str = None
+) -> T:
+    """Call something that needs a JWT token, getting a new token and calling again if the saved one is rejected.
+
+    A token that was just handed out by the server isn't retried so the user is only asked for creds once.
+
+    :param call: A function that takes the token and raises a `ValueError` when the server rejects it
+    :param url: The server to authenticate to
+    :param token_file: An optional path to a file containing a JWT token
+    :param username: An optional username
+    :param passwd: An optional passwd
+    :return: The result of `call`
+    """
+    if not (username and passwd) and token_file is not None and os.path.isfile(token_file):
+        token = _read_jwt_token_from_file(token_file)
+        if not is_token_expired(token):
+            try:
+                return call(token)
+            except ValueError:
+                # The saved token was rejected, fall through and get a new one.
+                pass
+    return call(get_jwt_token(url, token_file, username, passwd, force_refresh=True))
@@ -3,12 +3,12 @@
 import os
 from getpass import getuser
 import json
-import asyncio
+import orjson
 import argparse
 import websockets
-from muninn import ODIN_API_LOGGER, ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, APIField, APIStatus
+from muninn import ODIN_API_LOGGER, ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, APIField, APIStatus, run_async
 from muninn.formatting import print_table, Cleaned
-from muninn.auth import get_jwt_token
+from muninn.auth import call_with_jwt_token
 
 
 async def request_cleanup(ws: str, work: str, purge_db: bool = False, purge_fs: bool = False):
@@ -17,7 +17,7 @@ async def request_cleanup(ws: str, work: str, purge_db: bool = False, purge_fs:
         args = {'work': work, 'purge_db': purge_db, 'purge_fs': purge_fs}
         await websocket.send(json.dumps({APIField.COMMAND: 'CLEANUP', APIField.REQUEST: args}))
 
-        results = json.loads(await websocket.recv())
+        results = orjson.loads(await websocket.recv())
         if results[APIField.STATUS] == APIStatus.ERROR:
             ODIN_API_LOGGER.error(results)
             return
@@ -36,15 +36,14 @@ def _result2cleanup(result):
     )
 
 
-def request_cleanup_http(url: str, jwt_token: str, work: str, purge_db: bool = False, purge_fs: bool = False) -> None:
+def request_cleanup_http(client: HttpClient, work: str, purge_db: bool = False, purge_fs: bool = False) -> None:
     """Request the status over HTTP
-    :param url: the base URL
-    :param jwt_token: The token for last user auth
+    :param client: The client connected to the server
     :param work: The pipeline ID
     :param purge_db: Should we delete the pipeline from the jobs db too?
     :param purge_fs: Should we remove pipeline file system artifacts?
     """
-    results = HttpClient(url, jwt_token=jwt_token).delete_pipeline(work, purge_db, purge_fs)
+    results = client.delete_pipeline(work, purge_db, purge_fs)
     cleaned = [_result2cleanup(r) for r in results['cleanups']]
     print("Results of this request:")
     print_table(cleaned)
@@ -72,17 +71,15 @@ def main():
     url = f'{args.scheme}://{args.host}:{args.port}'
 
     if args.scheme.startswith('ws'):
-        asyncio.get_event_loop().run_until_complete(request_cleanup(url, args.work, args.db, args.fs))
+        run_async(request_cleanup(url, args.work, args.db, args.fs))
     else:
-        jwt_token = get_jwt_token(url, args.token, args.username, args.password)
-        try:
-            request_cleanup_http(url, jwt_token, args.work, args.db, args.fs)
-        except ValueError:
-            # Try deleting the token file and start again
-            if os.path.exists(args.token):
-                os.remove(args.token)
-                jwt_token = get_jwt_token(url, args.token, args.username, args.password)
-                request_cleanup_http(url, jwt_token, args.work, args.db, args.fs)
+        client = HttpClient(url)
+
+        def cleanup(jwt_token: str) -> None:
+            client.jwt_token = jwt_token
+            request_cleanup_http(client, args.work, args.db, args.fs)
+
+        call_with_jwt_token(cleanup, url, args.token, args.username, args.password)
 
 
 if __name__ == "__main__":
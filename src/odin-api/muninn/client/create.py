@@ -5,17 +5,16 @@ import json
 import argparse
 from getpass import getuser
 from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient
-from muninn.auth import get_jwt_token
+from muninn.auth import call_with_jwt_token
 
 
-def create_job_http(url: str, jwt_token: str, name: str) -> None:
+def create_job_http(client: HttpClient, name: str) -> None:
     """Request the server makes a new job.
 
-    :param url: Base url of the remote odin server
-    :param jwt_token: You JWT authentication token
+    :param client: The client connected to the remote odin server
     :param name: The name of the job you want to create
     """
-    results = HttpClient(url, jwt_token).create_job(name)
+    results = client.create_job(name)
     print(json.dumps(results))
 
 
@@ -34,14 +33,13 @@ def main():
     args = parser.parse_args()
     url = f'{args.scheme}://{args.host}:{args.port}'
 
-    jwt_token = get_jwt_token(url, args.token, args.username, args.password)
-    try:
-        create_job_http(url, jwt_token, args.job)
-    except ValueError:
-        if os.path.exists(args.token):
-            os.remove(args.token)
-            jwt_token = get_jwt_token(url, args.token, args.username, args.password)
-            create_job_http(url, jwt_token, args.job)
+    client = HttpClient(url)
+
+    def create(jwt_token: str) -> None:
+        client.jwt_token = jwt_token
+        create_job_http(client, args.job)
+
+    call_with_jwt_token(create, url, args.token, args.username, args.password)
 
 
 if __name__ == "__main__":
@@ -1,10 +1,10 @@
 """HTTP client to get job data."""
 
 import json
-import asyncio
+import orjson
 import argparse
 import websockets
-from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, ODIN_API_LOGGER, APIField, APIStatus
+from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, ODIN_API_LOGGER, APIField, APIStatus, run_async
 
 
 async def request_data(url: str, resource: str) -> None:
@@ -16,7 +16,7 @@ async def request_data(url: str, resource: str) -> None:
     """
     async with websockets.connect(url) as websocket:
         await websocket.send(json.dumps({APIField.COMMAND: 'DATA', APIField.REQUEST: {'resource': resource}}))
-        resp = json.loads(await websocket.recv())
+        resp = orjson.loads(await websocket.recv())
         if resp[APIField.STATUS] == APIStatus.ERROR:
             ODIN_API_LOGGER.error(resp)
             return
@@ -50,7 +50,7 @@ def main():
     url = f'{args.scheme}://{args.host}:{args.port}'
 
     if args.scheme.startswith('ws'):
-        asyncio.get_event_loop().run_until_complete(request_data(url, args.resource))
+        run_async(request_data(url, args.resource))
     else:
         request_data_http(url, args.resource)
 
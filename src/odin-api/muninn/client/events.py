@@ -1,11 +1,11 @@
 """Websocket client to get the k8s events that act on some resource."""
 
 import json
-import asyncio
+import orjson
 import argparse
 import websockets
 from collections import namedtuple
-from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, ODIN_API_LOGGER, APIField, APIStatus
+from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, ODIN_API_LOGGER, APIField, APIStatus, run_async
 from muninn.formatting import print_table, Event
 
 async def request_events(url: str, resource: str, namespace: str = 'default') -> None:
@@ -19,7 +19,7 @@ async def request_events(url: str, resource: str, namespace: str = 'default') ->
         await websocket.send(
             json.dumps({APIField.COMMAND: 'EVENTS', APIField.REQUEST: {'resource': resource, 'namespace': namespace}})
         )
-        resp = json.loads(await websocket.recv())
+        resp = orjson.loads(await websocket.recv())
         if resp[APIField.STATUS] == APIStatus.ERROR:
             ODIN_API_LOGGER.error(resp)
             return
@@ -67,7 +67,7 @@ def main():
     url = f'{args.scheme}://{args.host}:{args.port}'
 
     if args.scheme.startswith('ws'):
-        asyncio.get_event_loop().run_until_complete(request_events(url, args.resource, args.namespace))
+        run_async(request_events(url, args.resource, args.namespace))
     else:
         request_events_http(url, args.resource)
 
@@ -14,7 +14,7 @@ def _gpu2row(gpu, host):
         processes = ' '.join(p['process_name'] for p in proc_group)
         pids = ' '.join(str(p['pid']) for p in proc_group)
         free = 'YES' if len(proc_group) == 0 else 'NO'
-        used_memory = sum([int(p['used_memory']) for p in proc_group])
+        used_memory = sum(int(p['used_memory']) for p in proc_group)
     else:
         processes = 'NA'
         pids = 'NA'
@@ -33,12 +33,7 @@ def request_nodes_http(url: str) -> None:
     :param url: the base URL
     """
     nodes = HttpClient(url).request_cluster_hw_status()
-    rows = []
-
-    for node in nodes:
-        for gpu in node['gpus']:
-            rows.append(_gpu2row(gpu, node['host']))
-    print_table(rows)
+    print_table([_gpu2row(gpu, node['host']) for node in nodes for gpu in node['gpus']])
 
 
 def main():
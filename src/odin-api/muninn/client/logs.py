@@ -1,12 +1,12 @@
 """A websocket client to get or stream logs from a container."""
 
 import json
-import asyncio
+import orjson
 import argparse
 import signal
 from typing import Optional
 import websockets
-from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, ODIN_API_LOGGER, APIField, APIStatus
+from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, ODIN_API_LOGGER, APIField, APIStatus, run_async
 
 
 async def request_logs(
@@ -29,15 +29,18 @@ async def request_logs(
         work['container'] = container
     if lines is not None:
         work['lines'] = lines
-    async with websockets.connect(ws) as websocket:
+    # Log lines are small and don't compress well but a snapshot of every pod can be bigger than the 1MiB default
+    async with websockets.connect(ws, compression=None, max_size=None) as websocket:
         await websocket.send(json.dumps({APIField.COMMAND: 'LOGS', APIField.REQUEST: work}))
-        line = json.loads(await websocket.recv())
+        line = orjson.loads(await websocket.recv())
         while line[APIField.STATUS] != APIStatus.END:
             if line[APIField.STATUS] == APIStatus.ERROR:
                 ODIN_API_LOGGER.error(line)
                 break
-            ODIN_API_LOGGER.info(line[APIField.RESPONSE])
-            line = json.loads(await websocket.recv())
+            # A message can hold several lines, a snapshot of the logs or a batch of followed lines
+            for log in line[APIField.RESPONSE].split('\n'):
+                ODIN_API_LOGGER.info(log)
+            line = orjson.loads(await websocket.recv())
 
 
 def log_all_children_http(url, resource):
@@ -80,9 +83,7 @@ def main():
 
     else:
 
-        asyncio.get_event_loop().run_until_complete(
-            request_logs(endpoint, args.resource, args.namespace, args.container, args.follow, args.lines)
-        )
+        run_async(request_logs(endpoint, args.resource, args.namespace, args.container, args.follow, args.lines))
 
 
 if __name__ == "__main__":
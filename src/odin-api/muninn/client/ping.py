@@ -1,11 +1,11 @@
 """Websocket client to check if odin is running."""
 
 import argparse
-import asyncio
 from datetime import datetime
 import json
+import orjson
 import websockets
-from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, ODIN_API_LOGGER, APIField, APIStatus
+from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, ODIN_API_LOGGER, APIField, APIStatus, run_async
 
 
 async def ping(uri: str) -> None:
@@ -17,7 +17,7 @@ async def ping(uri: str) -> None:
     async with websockets.connect(uri) as websocket:
         message = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
         await websocket.send(json.dumps({APIField.COMMAND: 'PING', APIField.REQUEST: message}))
-        resp = json.loads(await websocket.recv())
+        resp = orjson.loads(await websocket.recv())
         if resp[APIField.STATUS] == APIStatus.ERROR:
             print('ERROR', resp)
             raise RuntimeError(resp)
@@ -52,7 +52,7 @@ def main():
     url = f'{args.scheme}://{args.host}:{args.port}'
 
     if args.scheme.startswith('ws'):
-        asyncio.get_event_loop().run_until_complete(ping(url))
+        run_async(ping(url))
     else:
         ping_http(url)
     args = parser.parse_args()
@@ -4,13 +4,14 @@ import os
 import json
 import argparse
 from getpass import getuser
+from typing import BinaryIO, Union
 from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient
-from muninn.auth import get_jwt_token
+from muninn.auth import call_with_jwt_token
 from baseline.utils import color, Colors
 
 
 def push_file_maybe_create_job(
-    url: str, jwt_token: str, job: str, file_name: str, file_contents: str, create_job: bool
+    url: str, jwt_token: str, job: str, file_name: str, file_contents: Union[bytes, BinaryIO], create_job: bool
 ) -> None:
     """Push a file to update a remove pipeline.
 
@@ -18,7 +19,7 @@ def push_file_maybe_create_job(
     :param jwt_token: The jwt token used to auth with odin
     :param job: The job definition that will be updated
     :param file_name: The name to save the file as on the remove server
-    :param file_contents: The content of the file we want to upload
+    :param file_contents: The content of the file we want to upload, or the open file to stream it from
     """
     client = HttpClient(url, jwt_token=jwt_token)
     if create_job:
@@ -56,18 +57,14 @@ def main():
 
     url = f'{args.scheme}://{args.host}:{args.port}'
     file_name = args.file_name if args.file_name is not None else args.file
-    with open(args.file) as rf:
-        file_contents = rf.read()
+    # The open file is passed as the body so it is streamed from disk, byte for byte, instead of read into memory
+    with open(args.file, 'rb') as rf:
 
-    jwt_token = get_jwt_token(url, args.token, args.username, args.password)
-    try:
-        push_file_maybe_create_job(url, jwt_token, args.job, file_name, file_contents, args.create)
-    except ValueError:
-        # Try deleting the token file and start again
-        if os.path.exists(args.token):
-            os.remove(args.token)
-            jwt_token = get_jwt_token(url, args.token, args.username, args.password)
-            push_file_maybe_create_job(url, jwt_token, args.job, file_name, file_contents, args.create)
+        def push(jwt_token: str) -> None:
+            rf.seek(0)
+            push_file_maybe_create_job(url, jwt_token, args.job, file_name, rf, args.create)
+
+        call_with_jwt_token(push, url, args.token, args.username, args.password)
 
 
 if __name__ == "__main__":
@@ -2,14 +2,14 @@
 import argparse
 from getpass import getuser
 import os
-import asyncio
 import json
+import orjson
 import signal
 from typing import Dict
 import websockets
 from mead.utils import parse_and_merge_overrides
-from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, ODIN_API_LOGGER, APIField, APIStatus
-from muninn.auth import get_jwt_token
+from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, ODIN_API_LOGGER, APIField, APIStatus, run_async
+from muninn.auth import call_with_jwt_token
 
 
 async def schedule_pipeline(ws, work) -> None:
@@ -20,7 +20,7 @@ async def schedule_pipeline(ws, work) -> None:
     async with websockets.connect(ws) as websocket:
         await websocket.send(json.dumps({APIField.COMMAND: 'START', APIField.REQUEST: work}))
 
-        result = json.loads(await websocket.recv())
+        result = orjson.loads(await websocket.recv())
         while result[APIField.STATUS] != APIStatus.END:
             if result[APIField.STATUS] == APIStatus.ERROR:
                 ODIN_API_LOGGER.error(result)
@@ -31,7 +31,7 @@ async def schedule_pipeline(ws, work) -> None:
                 ODIN_API_LOGGER.info('Started %s', pipe_id)
             else:
                 ODIN_API_LOGGER.info(result[APIField.RESPONSE])
-            result = json.loads(await websocket.recv())
+            result = orjson.loads(await websocket.recv())
 
 
 def schedule_pipeline_http(url: str, jwt_token: str, work: str, context: Dict) -> None:
@@ -73,17 +73,15 @@ def main():
     if args.scheme.startswith('ws'):
         if context:
             ODIN_API_LOGGER.warning("Context is ignored by web-socket tier")
-        asyncio.get_event_loop().run_until_complete(schedule_pipeline(url, args.work))
+        run_async(schedule_pipeline(url, args.work))
     else:
-        jwt_token = get_jwt_token(url, args.token, args.username, args.password)
-        try:
-            schedule_pipeline_http(url, jwt_token, args.work, context)
-        except ValueError:
-            # Try deleting the token file and start again
-            if os.path.exists(args.token):
-                os.remove(args.token)
-                jwt_token = get_jwt_token(url, args.token, args.username, args.password)
-                schedule_pipeline_http(url, jwt_token, args.work, context)
+        call_with_jwt_token(
+            lambda jwt_token: schedule_pipeline_http(url, jwt_token, args.work, context),
+            url,
+            args.token,
+            args.username,
+            args.password,
+        )
 
 
 if __name__ == '__main__':
@@ -1,9 +1,9 @@
 """Websocket client"""
 import argparse
-import asyncio
 import json
+import orjson
 import websockets
-from muninn import ODIN_URL, ODIN_PORT, ODIN_API_LOGGER, APIField, APIStatus
+from muninn import ODIN_URL, ODIN_PORT, ODIN_API_LOGGER, APIField, APIStatus, run_async
 
 
 async def request_pipeline_definitions(ws: str, pipeline: str) -> None:
@@ -11,7 +11,7 @@ async def request_pipeline_definitions(ws: str, pipeline: str) -> None:
     async with websockets.connect(ws) as websocket:
         await websocket.send(json.dumps({APIField.COMMAND: 'SHOW', APIField.REQUEST: pipeline}))
 
-        result = json.loads(await websocket.recv())
+        result = orjson.loads(await websocket.recv())
         if result[APIField.STATUS] == APIStatus.ERROR:
             ODIN_API_LOGGER.error(result)
             return
@@ -37,7 +37,7 @@ def main():
     )
     args = parser.parse_args()
     ws = f'{args.scheme}://{args.host}:{args.port}'
-    asyncio.get_event_loop().run_until_complete(request_pipeline_definitions(ws, args.work))
+    run_async(request_pipeline_definitions(ws, args.work))
 
 
 if __name__ == '__main__':
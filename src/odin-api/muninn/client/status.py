@@ -1,7 +1,7 @@
 """Websocket client to get the status a job."""
 
 import json
-import asyncio
+import orjson
 import argparse
 from typing import Set, List, Optional
 import websockets
@@ -10,7 +10,7 @@ from eight_mile.utils import listify, read_config_stream
 from baseline.utils import exporter, color, Colors
 
 from muninn.formatting import show_status, Row, Pipeline
-from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, ODIN_API_LOGGER, APIField, APIStatus
+from muninn import ODIN_URL, ODIN_PORT, ODIN_SCHEME, HttpClient, ODIN_API_LOGGER, APIField, APIStatus, run_async
 
 
 
@@ -25,7 +25,7 @@ async def request_status(ws: str, work: str, columns: Set[str], all_cols: bool =
     async with websockets.connect(ws) as websocket:
         await websocket.send(json.dumps({APIField.COMMAND: 'STATUS', APIField.REQUEST: work}))
 
-        results = json.loads(await websocket.recv())
+        results = orjson.loads(await websocket.recv())
         if results[APIField.STATUS] == APIStatus.ERROR:
             ODIN_API_LOGGER.error(results)
             return
@@ -97,7 +97,7 @@ def main():
     url = f'{args.scheme}://{args.host}:{args.port}'
 
     if args.scheme.startswith('ws'):
-        asyncio.get_event_loop().run_until_complete(request_status(url, args.work, set(args.columns), args.all))
+        run_async(request_status(url, args.work, set(args.columns), args.all))
     else:
         request_status_http(url, args.work, set(args.columns), args.all)
 
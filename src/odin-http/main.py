@@ -1,5 +1,5 @@
 import glob
-import requests
+import httpx
 import time
 import asyncio
 from shutil import copyfile
@@ -11,6 +11,7 @@ from jinja2 import Template
 from kubernetes import client, config
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 import os
+import stat
 import git
 from datetime import datetime
 import logging
@@ -36,7 +37,7 @@ PIPELINES_MAIN = os.environ.get('ODIN_PIPELINES_MAIN', 'master')
 RENDERED_TEMPLATES = os.environ.get('ODIN_RENDER_PATH', 'rendered')
 JWT_ISSUER = os.environ.get('ODIN_AUTH_ISSUER', 'com.interactions')
 JWT_SECRET = os.environ.get('ODIN_SECRET')
-JWT_LIFETIME_SECONDS = os.environ.get('ODIN_TOKEN_DURATION', 60 * 60 * 12)
+JWT_LIFETIME_SECONDS = int(os.environ.get('ODIN_TOKEN_DURATION', 60 * 60 * 12))
 JWT_ALGORITHM = os.environ.get('ODIN_AUTH_ALG', 'HS256')
 MIDGARD_PORT = os.environ.get('MIDGARD_PORT', 29999)
 MIDGARD_API_VERSION = os.environ.get('MIDGARD_API_VERSION', 'v1')
@@ -48,6 +49,8 @@ ODIN_DB = os.getenv('ODIN_DB', 'odin_db')
 ODIN_FS_ROOT = os.getenv('ODIN_FS_ROOT', '/data/pipelines')
 LOGGER = logging.getLogger('odin-http')
 TEMPLATE_SUFFIX = ".jinja2"
+# Midgard is polled on every /nodes request so keep connections to the nodes alive between calls
+MIDGARD_CLIENT = httpx.Client(timeout=2.0, limits=httpx.Limits(max_keepalive_connections=32, max_connections=64))
 
 def get_db_config() -> dict:
     cred_params = {}
@@ -199,19 +202,22 @@ def _update_job_repo() -> None:
     _stash_pull_pop(repo)
 
 
-def _add_to_job_repo(filename: str, message: str = None) -> str:
-    """Push a directory to git
+def _add_to_job_repo(filenames: List[str], message: str = None) -> str:
+    """Commit and push files to the job repo
 
-    :param dir: Directory
-    :raises ChoreSkippedException: If there is missing inputs.
-    :return: `True`
+    All the files are added in a single commit so the repo is only synced once.
+
+    :param filenames: The files to add
+    :param message: The commit message
+    :return: The sha of the repo head
     """
 
     repo = git.Repo(ODIN_FS_ROOT)
     repo = set_repo_creds(repo)
     _stash_pull_pop(repo)
-    repo.git.add([filename])
-    if repo.is_dirty():
+    repo.git.add(filenames)
+    # Only commit if something was actually staged
+    if repo.index.diff("HEAD"):
         repo.git.commit(m=message)
         repo.git.push()
     sha = repo.head.object.hexsha
@@ -300,8 +306,8 @@ def _job_def(id_):
             tasks.append(task_def)
         job_def = JobDefinition(tasks=tasks, location=job_loc, name=id_, id=id_, configs=_get_job_files(job_loc))
         return job_def
-    except Exception as e:
-        LOGGER.error(e)
+    except (OSError, yaml.YAMLError, KeyError, TypeError, ValueError) as e:
+        LOGGER.error("Failed to read job %s: %s", id_, e)
         return None
 
 
@@ -360,7 +366,7 @@ def get_node_info() -> str:
         host = [a.address for a in addresses if a.type == 'Hostname'][0]
         capacity_dict = node.status.capacity
         midgard_url = f'http://{internal_address}:{MIDGARD_PORT}/{MIDGARD_API_VERSION}/gpus'
-        gpu_infos = requests.get(midgard_url).json()['gpus']
+        gpu_infos = MIDGARD_CLIENT.get(midgard_url).json()['gpus']
         capacity_dict['gpus'] = gpu_infos
         capacity_dict['host'] = host
         capacity_dict['internalIP'] = internal_address
@@ -426,10 +432,16 @@ def get_jobs(q: Optional[str] = '*') -> JobResults:
     for path_value in glob.glob(os.path.join(ODIN_FS_ROOT, file_star)):
         id_ = os.path.basename(path_value)
         job_loc = os.path.join(path_value, 'main.yml')
-        if os.path.exists(job_loc) and os.path.isfile(job_loc):
-            job_def = _job_def(id_)
-            if job_def:
-                job_defs.append(job_def)
+        # A single stat tells us if there is a non-empty job file, skip everything else before parsing any yaml
+        try:
+            job_stat = os.stat(job_loc)
+        except OSError:
+            continue
+        if not stat.S_ISREG(job_stat.st_mode) or job_stat.st_size == 0:
+            continue
+        job_def = _job_def(id_)
+        if job_def:
+            job_defs.append(job_def)
     return JobResults(job_defs)
 
 
@@ -451,7 +463,7 @@ def create_job(job_def: JobWrapperDefinition, token: str=Depends(oauth2_scheme))
     task_obj = {'tasks': []}
     with open(file_to_write, 'w') as wf:
         yaml.dump(task_obj, wf)
-    sha = _add_to_job_repo(file_to_write, "via odin-http create_job")
+    sha = _add_to_job_repo([file_to_write], "via odin-http create_job")
     LOGGER.info(f'Updated git {sha}')
 
     updated_job_def = JobDefinition(id=id_,
@@ -476,22 +488,24 @@ def update_job(job_id: str, job_def: JobDefinition, token: str=Depends(oauth2_sc
     # compute the id of the tasks if needed
 
     task_obj = {'tasks': tasks}
+    job_loc = _get_job_loc(id_)
+    if os.path.exists(job_loc) is False:
+        logging.info('Creating job location {}'.format(job_loc))
+        os.makedirs(job_loc)
+
+    files_to_add = []
     configs = job_def.configs
     for config in configs:
         file_to_write = _get_job_file(id_, config.name)
         with open(file_to_write, 'w') as wf:
             wf.write(config.content)
-        _add_to_job_repo(file_to_write, 'via odin-http create_job')
-
-    job_loc = _get_job_loc(id_)
-    if os.path.exists(job_loc) is False:
-        logging.info('Creating job location {}'.format(job_loc))
-        os.makedirs(job_loc)
+        files_to_add.append(file_to_write)
 
     file_to_write = _get_job_file(id_, 'main.yml')
     with open(file_to_write, 'w') as wf:
         yaml.dump(task_obj, wf)
-    sha = _add_to_job_repo(file_to_write, "via odin-http create_job")
+    files_to_add.append(file_to_write)
+    sha = _add_to_job_repo(files_to_add, "via odin-http create_job")
     LOGGER.info(f'Updated git {sha}')
     job_def.tasks = tasks
     return JobWrapperDefinition(job_def)
@@ -516,7 +530,7 @@ async def upload_job_file(job_id: str, filename: str, body: Request=Body(..., me
     with open(file_to_write, 'wb') as wf:
         wf.write(body)
 
-    sha = _add_to_job_repo(file_to_write, "via odin-http upload_job_file")
+    sha = _add_to_job_repo([file_to_write], "via odin-http upload_job_file")
     ud = UploadDefinition(location=f'{file_to_write}@{sha}', bytes=os.stat(file_to_write).st_size)
     return ud
 
@@ -0,0 +1,18 @@
+"""Keys and status codes used when communicating with the odin websocket server."""
+
+
+class APIField:
+    """Keys that we use when communicating between server and clients."""
+
+    STATUS = 'status'
+    RESPONSE = 'response'
+    COMMAND = 'command'
+    REQUEST = 'request'
+
+
+class APIStatus:
+    """Status codes used between the server and client."""
+
+    OK = 'OK'
+    ERROR = 'ERROR'
+    END = 'END'
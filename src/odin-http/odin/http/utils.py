@@ -2,28 +2,19 @@ import os
 import logging
 import websockets
 import git
-import json
+import orjson
 import re
 from odin.http.models import *
+from odin.http.api_constants import APIField, APIStatus
 
 LOGGER = logging.getLogger('odin-http')
 
 
-class APIField:
-    """Keys that we use when communicating between server and clients."""
+def _dumps(obj) -> str:
+    return orjson.dumps(obj).decode('utf-8')
 
-    STATUS = 'status'
-    RESPONSE = 'response'
-    COMMAND = 'command'
-    REQUEST = 'request'
 
-
-class APIStatus:
-    """Status codes used between the server and client."""
-
-    OK = 'OK'
-    ERROR = 'ERROR'
-    END = 'END'
+_loads = orjson.loads
 
 
 def _event_def(id_, row):
@@ -56,7 +47,7 @@ def _step_status(row):
     return s
 
 
-def _pipeline_status(row):
+def _pipeline_status(row, tasks=None):
     p = PipelineDefinition(
         name=row['label'],
         id=row['label'],
@@ -66,6 +57,10 @@ def _pipeline_status(row):
         version=row.get('version'),
         completion_time=row['completed']
     )
+    # The task models are already validated, attaching them after construction
+    # keeps pydantic from validating (and copying) each one a second time
+    if tasks is not None:
+        p.tasks = tasks
     return p
 
 
@@ -80,8 +75,8 @@ def _convert_to_path(resource_id: str) -> str:
 async def _submit_job(ws, work) -> None:
     _pipe_id = None
     async with websockets.connect(ws) as websocket:
-        await websocket.send(json.dumps({APIField.COMMAND: 'START', APIField.REQUEST: work}))
-        result = json.loads(await websocket.recv())
+        await websocket.send(_dumps({APIField.COMMAND: 'START', APIField.REQUEST: work}))
+        result = _loads(await websocket.recv())
         if result[APIField.STATUS] == APIStatus.ERROR:
             LOGGER.error(result)
             raise Exception("Invalid response")
@@ -98,8 +93,8 @@ async def _ping_ws_server(uri: str):
     """
     async with websockets.connect(uri) as websocket:
         msg = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
-        await websocket.send(json.dumps({APIField.COMMAND: 'PING', APIField.REQUEST: msg}))
-        resp = json.loads(await websocket.recv())
+        await websocket.send(_dumps({APIField.COMMAND: 'PING', APIField.REQUEST: msg}))
+        resp = _loads(await websocket.recv())
         if resp[APIField.STATUS] == APIStatus.ERROR:
             return f"unresponsive ({msg})"
         return f"responsive ({msg})"
@@ -108,19 +103,18 @@ async def _request_status(ws, work):
     """Request the status of a job from the server."""
     pipe_statuses = []
     async with websockets.connect(ws) as websocket:
-        await websocket.send(json.dumps({APIField.COMMAND: 'STATUS', APIField.REQUEST: work}))
+        await websocket.send(_dumps({APIField.COMMAND: 'STATUS', APIField.REQUEST: work}))
 
-        results = json.loads(await websocket.recv())
+        results = _loads(await websocket.recv())
         if results[APIField.STATUS] == APIStatus.ERROR:
             LOGGER.error(results)
             return
         if results[APIField.STATUS] == APIStatus.OK:
             results = results[APIField.RESPONSE]
-            for result in results:
-                task_status = [_step_status(r) for r in result['task_statuses']]
-                pipe_status = _pipeline_status(result['pipeline_status'])
-                pipe_status.tasks = task_status
-                pipe_statuses.append(pipe_status)
+            pipe_statuses = [
+                _pipeline_status(result['pipeline_status'], [_step_status(r) for r in result['task_statuses']])
+                for result in results
+            ]
         return PipelineResults(pipelines=pipe_statuses)
 
 
@@ -128,9 +122,9 @@ async def _request_cleanup(ws: str, work: str, purge_db: bool = False, purge_fs:
     """Request the work is cleaned up by the server."""
     async with websockets.connect(ws) as websocket:
         args = {'work': work, 'purge_db': purge_db, 'purge_fs': purge_fs}
-        await websocket.send(json.dumps({APIField.COMMAND: 'CLEANUP', APIField.REQUEST: args}))
+        await websocket.send(_dumps({APIField.COMMAND: 'CLEANUP', APIField.REQUEST: args}))
 
-        results = json.loads(await websocket.recv())
+        results = _loads(await websocket.recv())
         if results[APIField.STATUS] == APIStatus.ERROR:
             LOGGER.error(results)
             return []
@@ -150,14 +144,14 @@ async def _request_events(ws: str, resource: str, namespace: str = 'default', ki
     """
     async with websockets.connect(ws) as websocket:
         await websocket.send(
-            json.dumps(
+            _dumps(
                 {
                     APIField.COMMAND: 'EVENTS',
                     APIField.REQUEST: {'resource': resource, 'namespace': namespace, 'kind': kind},
                 }
             )
         )
-        resp = json.loads(await websocket.recv())
+        resp = _loads(await websocket.recv())
         if resp[APIField.STATUS] == APIStatus.ERROR:
             LOGGER.error(resp)
             return
@@ -177,14 +171,14 @@ async def _request_data(ws: str, resource: str, namespace: str = 'default') -> N
     """
     async with websockets.connect(ws) as websocket:
         await websocket.send(
-            json.dumps(
+            _dumps(
                 {
                     APIField.COMMAND: 'DATA',
                     APIField.REQUEST: {'resource': resource, 'namespace': namespace},
                 }
             )
         )
-        resp = json.loads(await websocket.recv())
+        resp = _loads(await websocket.recv())
         if resp[APIField.STATUS] == APIStatus.ERROR:
             LOGGER.error(resp)
             return
@@ -200,16 +194,17 @@ async def _request_logs(ws: str, resource: str, namespace: str = 'default') -> N
     :param namespace: The namespace of the resource you are asking about.
     :param kind: The kind of resource you are asking about.
     """
-    async with websockets.connect(ws) as websocket:
+    # A snapshot of the logs of every pod can be bigger than the 1MiB default
+    async with websockets.connect(ws, compression=None, max_size=None) as websocket:
         await websocket.send(
-            json.dumps(
+            _dumps(
                 {
                     APIField.COMMAND: 'LOGS',
                     APIField.REQUEST: {'resource': resource, 'namespace': namespace},
                 }
             )
         )
-        resp = json.loads(await websocket.recv())
+        resp = _loads(await websocket.recv())
         if resp[APIField.STATUS] == APIStatus.ERROR:
             LOGGER.error(resp)
             return
@@ -1,7 +1,6 @@
 """A demo chore that sends a message to slack, used to test/demonstrate chore plugins."""
 
-import requests
-from odin.chores import register_chore
+from odin.chores import register_chore, HTTP_SESSION, HTTP_TIMEOUT
 
 
 @register_chore('demo-chore')
@@ -10,4 +9,6 @@ def slack_webhook(webhook: str) -> None:
 
     :param webhook: The url to send the message to.
     """
-    requests.post(webhook, json={"text": "This is a demo slack message sent with a chore addon"})
+    HTTP_SESSION.post(
+        webhook, json={"text": "This is a demo slack message sent with a chore addon"}, timeout=HTTP_TIMEOUT
+    )
@@ -1,17 +1,42 @@
 """A chore that summarizes and notifies the mead eval performance."""
 
 import os
-from typing import Dict
+import csv
+from typing import Dict, List, Tuple
 from string import Template
-import requests
-import pandas as pd
-from odin.chores import register_chore
+from odin.chores import register_chore, HTTP_SESSION, HTTP_TIMEOUT
+
+READ_BUFFER_SIZE = 1024 * 1024
+
+
+def _read_mismatches(file_name: str) -> Tuple[List[Tuple[int, List[str]]], int]:
+    """Stream the rows of a mead eval TSV, keeping the ones where the label and the prediction differ.
+
+    :param file_name: The TSV file written by mead eval
+    :returns: The row number and the row for each mismatch, and the number of columns in the widest row
+    """
+    mismatches = []
+    width = 0
+    with open(file_name, newline='', buffering=READ_BUFFER_SIZE) as rf:
+        # Blank lines are skipped and not counted, like `pandas.read_csv` does
+        rows = (row for row in csv.reader(rf, delimiter='\t') if row)
+        for i, row in enumerate(rows):
+            # Pad short rows the way pandas fills in missing columns, a row with a label
+            # but no prediction still counts as a failure
+            row += [''] * (3 - len(row))
+            width = max(width, len(row))
+            if row[1] != row[2]:
+                mismatches.append((i, row))
+    return mismatches, width
 
 
 @register_chore('slack-eval-report-intent')
 def slack_webhook_mead_eval_intent(parent_details: Dict, webhook: str, template: str, base_dir: str) -> None:
     """Substitute a template message and post to slack
 
+    The eval files are streamed so only their mismatched rows are held in memory. `results.csv`
+    gets a column for every column of the widest file, like concatenating the DataFrames would.
+
     :param parent_details: The context to use to replace values in the template.
     :param webhook: The webhook key
     :param template: The message.
@@ -19,15 +44,21 @@ def slack_webhook_mead_eval_intent(parent_details: Dict, webhook: str, template:
     """
 
     message: str = Template(template).substitute(parent_details)
-    mismatched_jobs = []
-    for job_id in parent_details['executed']:
-        if 'mead-eval' in job_id:
-            df = pd.read_csv(os.path.join(base_dir, f'{job_id}.tsv'), header=None, sep='\t')
-            mismatched = df[df[1] != df[2]].copy()
-            mismatched.insert(0, 'job_id', job_id)
-            message = message + f'\n[[job_id]] {job_id} [[failures]]: {len(mismatched)}'
-            os.remove(os.path.join(base_dir, f'{job_id}.tsv'))
-            mismatched_jobs.append(mismatched)
-    if mismatched_jobs:
-        pd.concat(mismatched_jobs).to_csv(os.path.join(base_dir, 'results.csv'))
-    requests.post(webhook, json={"text": message})
+    eval_jobs = [job_id for job_id in parent_details['executed'] if 'mead-eval' in job_id]
+    if eval_jobs:
+        mismatched_jobs = []
+        width = 0
+        for job_id in eval_jobs:
+            file_name = os.path.join(base_dir, f'{job_id}.tsv')
+            mismatches, job_width = _read_mismatches(file_name)
+            width = max(width, job_width)
+            mismatched_jobs.append((job_id, mismatches))
+            message = message + f'\n[[job_id]] {job_id} [[failures]]: {len(mismatches)}'
+            os.remove(file_name)
+        with open(os.path.join(base_dir, 'results.csv'), 'w', newline='') as wf:
+            writer = csv.writer(wf)
+            writer.writerow(['', 'job_id', *range(width)])
+            for job_id, mismatches in mismatched_jobs:
+                for i, row in mismatches:
+                    writer.writerow([i, job_id, *row, *[''] * (width - len(row))])
+    HTTP_SESSION.post(webhook, json={"text": message}, timeout=HTTP_TIMEOUT)
@@ -4,15 +4,24 @@ import argparse
 import logging
 import os
 import shutil
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import List, Dict, Callable, NewType, Optional
+from string import Template
+from typing import Any, List, Dict, Callable, NewType, Optional, Set, Tuple, Iterator
 import git
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from ruamel.yaml import YAML
 
 from eight_mile.utils import read_config_stream
 from baseline.utils import exporter, optional_params, import_user_module
 from odin.core import create_graph, _to_kwargs, wire_inputs, format_output
-from odin.dag import topo_sort, find_children, dot_graph
+from odin.dag import find_children, dot_graph, rev_graph, topo_sort
 from odin.store import create_store_backend
 
 __all__ = []
@@ -22,6 +31,86 @@ Chore = NewType('Chore', Callable)
 
 DEPENDENCY_KEY = 'depends'
 LOGGER = logging.getLogger('odin')
+# Chores that post to webhooks share a session so connections to the same host are reused
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount(
+    'https://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(total=3, backoff_factor=0.2))
+)
+HTTP_TIMEOUT = (3.05, 10)
+# Building the round trip loader is expensive so `bump-version` shares one
+_ROUND_TRIP_YAML = YAML(typ='rt')
+_ROUND_TRIP_LOCK = threading.Lock()
+
+
+class _RepoCache:
+    """The git repos opened by the chores of a single `run_chores` call.
+
+    A `git.Repo` keeps its `git cat-file` helper processes alive so sharing it between chores
+    means they are only started once per repo.
+    """
+
+    def __init__(self):
+        self.repos: Dict[Tuple[str, bool], git.Repo] = {}
+        # Chores can run in parallel so each repo gets a lock to keep them from racing on the index
+        self.locks: Dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()
+        # The (repo, name, email) creds already written to a repo's config during this run
+        self.creds: Set[Tuple[str, str, str]] = set()
+
+    @contextmanager
+    def open(self, path: str, search_parent_directories: bool = False) -> Iterator[git.Repo]:
+        """Open a git repo, reusing the one already opened for this path.
+
+        The repo is locked while the context is active.
+
+        :param path: The path to the repo
+        :param search_parent_directories: Should we look for the repo in the parents of `path`
+        :returns: The repo object
+        """
+        key = (_normalize_path(path), search_parent_directories)
+        with self.lock:
+            repo = self.repos.get(key)
+            if repo is None:
+                repo = git.Repo(key[0], search_parent_directories=search_parent_directories)
+                self.repos[key] = repo
+            lock = self.locks.setdefault(repo.working_dir, threading.Lock())
+        with lock:
+            yield repo
+
+    def close(self) -> None:
+        """Close all the repos that were opened."""
+        with self.lock:
+            for repo in self.repos.values():
+                repo.close()
+            self.repos.clear()
+            self.locks.clear()
+            self.creds.clear()
+
+
+# The repos of the `run_chores` call the current chore is part of, set by `_run_chore`
+_RUN_REPOS: ContextVar[Optional[_RepoCache]] = ContextVar('_RUN_REPOS', default=None)
+
+
+@contextmanager
+def _open_repo(path: str, search_parent_directories: bool = False) -> Iterator[git.Repo]:
+    """Open a git repo, reusing the one already opened for this path in the current chore run.
+
+    Outside of a chore run the repo is opened just for this context and closed afterwards.
+
+    :param path: The path to the repo
+    :param search_parent_directories: Should we look for the repo in the parents of `path`
+    :returns: The repo object
+    """
+    repos = _RUN_REPOS.get()
+    if repos is not None:
+        with repos.open(path, search_parent_directories) as repo:
+            yield repo
+        return
+    repo = git.Repo(_normalize_path(path), search_parent_directories=search_parent_directories)
+    try:
+        yield repo
+    finally:
+        repo.close()
 
 
 def set_repo_creds(
@@ -43,8 +132,15 @@ def set_repo_creds(
     """
     name = os.environ[name_env] if name is None else name
     email = os.environ[email_env] if email is None else email
-    repo.config_writer().set_value("user", "name", name).release()
-    repo.config_writer().set_value("user", "email", email).release()
+    # During a chore run the creds are only written once per repo
+    repos = _RUN_REPOS.get()
+    key = (repo.working_dir, name, email)
+    if repos is None or key not in repos.creds:
+        with repo.config_writer() as writer:
+            writer.set_value("user", "name", name)
+            writer.set_value("user", "email", email)
+        if repos is not None:
+            repos.creds.add(key)
     return repo
 
 
@@ -95,6 +191,54 @@ def create_chore(name: str) -> Chore:
     return CHORE_REGISTRY[name]
 
 
+def _normalize_path(path: str) -> str:
+    """Expand the user and make a path absolute
+
+    :param path: The path
+    :return: The absolute path
+    """
+    return os.path.abspath(os.path.expanduser(path))
+
+
+def _stat_mode(path: str) -> int:
+    """Get the mode of a path with a single `stat` call
+
+    :param path: The path
+    :return: The `st_mode` of the path or `0` if it doesn't exist
+    """
+    try:
+        return os.stat(path).st_mode
+    except (FileNotFoundError, NotADirectoryError):
+        return 0
+
+
+def _copy_file(src: str, dst: str) -> str:
+    """Copy a file and its metadata, letting the kernel move the bytes when it can.
+
+    `os.copy_file_range` keeps the data out of userspace and lets filesystems that
+    support it (btrfs, xfs, NFS) clone the file instead of copying it. When it isn't
+    available or the filesystem won't do it we fall back to `shutil.copy2`.
+
+    :param src: source file
+    :param dst: destination file
+    :return: The destination path
+    """
+    if not hasattr(os, 'copy_file_range'):
+        return shutil.copy2(src, dst)
+    try:
+        with open(src, 'rb') as rf, open(dst, 'wb') as wf:
+            remaining = os.fstat(rf.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(rf.fileno(), wf.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    except OSError:
+        return shutil.copy2(src, dst)
+    shutil.copystat(src, dst)
+    return dst
+
+
 @export
 @register_chore('copy')
 def copy(src: str, dst: str, clobber: bool = True) -> str:
@@ -108,23 +252,25 @@ def copy(src: str, dst: str, clobber: bool = True) -> str:
     """
     if src is None or dst is None:
         raise ChoreSkippedException()
-    src = os.path.abspath(os.path.expanduser(src))
-    dst = os.path.abspath(os.path.expanduser(dst))
+    src = _normalize_path(src)
+    dst = _normalize_path(dst)
+    name = os.path.basename(src)
 
     if os.path.isfile(src):
         # If dst is a directory that exists then we make a file in it
         # Not sure if we want this yet, only use cause rn is for dirs
-        if os.path.exists(dst) and os.path.isdir(dst):
-            dst = os.path.join(dst, os.path.basename(src))
-        shutil.copy2(src, dst)
+        if stat.S_ISDIR(_stat_mode(dst)):
+            dst = os.path.join(dst, name)
+        _copy_file(src, dst)
     else:
-        dst = os.path.join(dst, os.path.basename(src))
-        if clobber and os.path.exists(dst):
-            if os.path.isdir(dst):
+        dst = os.path.join(dst, name)
+        mode = _stat_mode(dst)
+        if clobber and mode:
+            if stat.S_ISDIR(mode):
                 shutil.rmtree(dst)
             else:
                 os.remove(dst)
-        shutil.copytree(src, dst)
+        shutil.copytree(src, dst, copy_function=_copy_file)
     return dst
 
 
@@ -138,17 +284,13 @@ def git_add(dir: Path, files: List[str] = None) -> bool:
     :raises ChoreSkippedException: If there is missing inputs.
     :return: `True`
     """
-    from git import Repo  # pylint: disable=import-outside-toplevel
-
     if files is None or any(f is None for f in files):
         raise ChoreSkippedException()
-    if dir is not None:
-        repo = Repo(dir)
-    else:
-        repo = Repo(files[0], search_parent_directories=True)
-    repo = set_repo_creds(repo)
-    for filename in files:
-        repo.git.add(os.path.expanduser(filename))
+    repo_path, search_parents = (dir, False) if dir is not None else (files[0], True)
+    with _open_repo(repo_path, search_parent_directories=search_parents) as repo:
+        repo = set_repo_creds(repo)
+        for filename in files:
+            repo.git.add(os.path.expanduser(filename))
     return True
 
 
@@ -162,22 +304,28 @@ def git_commit(dir: Path, message: str) -> bool:
     :raises ChoreSkippedException: If there is missing inputs.
     :return: `True`
     """
-    from git import Repo  # pylint: disable=import-outside-toplevel
-
     if dir is None or message is None:
         raise ChoreSkippedException()
-    repo = Repo(dir)
-    repo = set_repo_creds(repo)
-    # Check that files have been staged for commit
-    if not repo.index.diff("HEAD"):
-        raise ChoreSkippedException()
-    repo.git.commit(m=message)
+    with _open_repo(dir) as repo:
+        repo = set_repo_creds(repo)
+        # Check that files have been staged for commit
+        if not repo.index.diff("HEAD"):
+            raise ChoreSkippedException()
+        repo.git.commit(m=message)
     return True
 
 
 def _repo_version_match(repo: git.Repo) -> bool:
-    master = str(git.repo.fun.rev_parse(repo, 'origin/master'))
-    head = str(git.repo.fun.rev_parse(repo, 'HEAD'))
+    """Check if the local HEAD is at the same commit as `origin/master`.
+
+    The refs are resolved straight from the files in the `.git` dir, this avoids
+    starting a `git cat-file` process to look up the commit objects.
+
+    :param repo: The repo object
+    :returns: `True` if HEAD matches `origin/master`
+    """
+    master = git.SymbolicReference.dereference_recursive(repo, 'refs/remotes/origin/master')
+    head = git.SymbolicReference.dereference_recursive(repo, 'HEAD')
     return master == head
 
 
@@ -201,14 +349,12 @@ def git_push(dir: Path) -> bool:
     :raises ChoreSkippedException: If there is missing inputs.
     :return: `True`
     """
-    from git import Repo  # pylint: disable=import-outside-toplevel
-
     if dir is None:
         raise ChoreSkippedException()
-    repo = Repo(dir)
-    repo = set_repo_creds(repo)
-    _stash_pull_pop(repo)
-    repo.git.push()
+    with _open_repo(dir) as repo:
+        repo = set_repo_creds(repo)
+        _stash_pull_pop(repo)
+        repo.git.push()
     return True
 
 
@@ -221,13 +367,11 @@ def git_pull(dir: Path) -> bool:
     :raises ChoreSkippedException: If there is missing inputs.
     :returns: True
     """
-    from git import Repo  # pylint: disable=import-outside-toplevel
-
     if dir is None:
         raise ChoreSkippedException()
-    repo = Repo(dir)
-    repo = set_repo_creds(repo)
-    repo.git.pull()
+    with _open_repo(dir) as repo:
+        repo = set_repo_creds(repo)
+        repo.git.pull()
     return True
 
 
@@ -235,17 +379,17 @@ def git_pull(dir: Path) -> bool:
 @register_chore('bump-version')
 def bump_version(file_name: Path) -> str:
     """Bump the version with the ruamel round trip loader to preserve formatting."""
-    import ruamel.yaml  # pylint: disable=import-outside-toplevel
-
     if file_name is None:
         raise ChoreSkippedException()
-    with open(file_name) as rf:
-        config = ruamel.yaml.load(rf, Loader=ruamel.yaml.RoundTripLoader)
-    metadata = config.setdefault('metadata', {})
-    labels = metadata.setdefault('labels', {})
-    labels['version'] = str(int(labels.get('version', 0)) + 1)
-    with open(file_name, 'w') as out:
-        ruamel.yaml.dump(config, out, Dumper=ruamel.yaml.RoundTripDumper)
+    # The YAML object isn't thread safe and chores can run in parallel
+    with _ROUND_TRIP_LOCK:
+        with open(file_name) as rf:
+            config = _ROUND_TRIP_YAML.load(rf)
+        metadata = config.setdefault('metadata', {})
+        labels = metadata.setdefault('labels', {})
+        labels['version'] = str(int(labels.get('version', 0)) + 1)
+        with open(file_name, 'w') as out:
+            _ROUND_TRIP_YAML.dump(config, out)
     return file_name
 
 
@@ -276,54 +420,113 @@ def slack_webhook(parent_details: Dict, webhook: str, template: str) -> None:
     :param webhook: The webhook key
     :param template: The message.
     """
-    import requests  # pylint: disable=import-outside-toplevel
-    from string import Template  # pylint: disable=import-outside-toplevel
-
     message: str = Template(template).substitute(parent_details)
-    requests.post(webhook, json={"text": message})
+    HTTP_SESSION.post(webhook, json={"text": message}, timeout=HTTP_TIMEOUT)
 
 
-def run_chores(config: Dict, results: Dict) -> Dict:
+def _run_chore(chore: Chore, params: Dict, repos: Optional[_RepoCache] = None) -> Tuple[Any, bool]:
+    """Run a single chore, catching the exception it uses to signal it skipped.
+
+    :param chore: The chore to run
+    :param params: The (wired) inputs to the chore
+    :param repos: The repos shared by the chores of this run
+    :returns: The output of the chore and if it was skipped
+    """
+    token = _RUN_REPOS.set(repos)
+    try:
+        return chore(**params), False
+    except ChoreSkippedException:
+        return None, True
+    finally:
+        _RUN_REPOS.reset(token)
+
+
+def _release_children(step: int, graph: Dict[int, Set[int]], waiting_on: Dict[int, int]) -> List[int]:
+    """Mark a chore as finished and collect the children that are now ready to run.
+
+    :param step: The chore that finished
+    :param graph: The chore graph
+    :param waiting_on: The number of unfinished parents for each chore, updated in place
+    :returns: The children that have no unfinished parents left
+    """
+    ready = []
+    for child in graph[step]:
+        waiting_on[child] -= 1
+        if waiting_on[child] == 0:
+            ready.append(child)
+    return ready
+
+
+def run_chores(config: Dict, results: Dict, max_workers: int = 8) -> Dict:
     """Execute a chore graph
 
+    A chore is started as soon as all the chores it depends on have finished so
+    independent chores run in parallel on a thread pool.
+
     :param config: The list of chores and there deps
     :param results: A set of upstream results that can be used
+    :param max_workers: The maximum number of chores to run at the same time
+    :raises ValueError: If the chore graph has a cycle in it.
     :return: The new results, updated with chore output
     """
     graph = create_graph(config['chores'], results)
+    # Check for cycles before anything runs, chores have side effects like pushes and posts
+    topo_sort(graph)
+    # Look every chore up front so a bad type fails before anything has run.
+    chores = [create_chore(params['type']) for params in config['chores']]
 
     # Convert the graph from indices to names so it prints better.
-    named_graph = {config['chores'][k]['name']: [config['chores'][v]['name'] for v in vs] for k, vs in graph.items()}
-    LOGGER.info(dot_graph(named_graph))
+    if LOGGER.isEnabledFor(logging.INFO):
+        named_graph = {
+            config['chores'][k]['name']: [config['chores'][v]['name'] for v in vs] for k, vs in graph.items()
+        }
+        LOGGER.info(dot_graph(named_graph))
 
-    execution_order = topo_sort(graph)
     # Track nodes that give up and all the nodes that are downstream of them.
     to_skip = set()
     children = find_children(graph)
-    LOGGER.info("Topological Sort %s", execution_order)
-    for step in execution_order:
-        params = config['chores'][step]
-        name = params.pop('name')
-        if step in to_skip:
-            # If an ancestor of yours gave up you should give up.
-            LOGGER.debug("Chore %s skipped because of parent", name)
-            continue
-        chore_type = params.pop('type')
-        params.pop(DEPENDENCY_KEY, None)
-        LOGGER.debug('Feeding Inputs: %s(%s)', name, _to_kwargs(params))
-        LOGGER.debug(results)
-        chore = create_chore(chore_type)
-        params = wire_inputs(params, results, chore)
-        LOGGER.info('Running: %s(%s)', name, _to_kwargs(params))
-        try:
-            res = chore(**params)
-        except ChoreSkippedException:
-            # I decided to give up. All my descendants should give up.
-            res = None
-            LOGGER.debug("Chore %s raised a ChoreSkippedException", name)
-            to_skip.add(step)
-            to_skip.update(children[step])
-        results[name] = format_output(res)
+    # The number of unfinished parents for each chore, a chore is ready to run when this hits zero.
+    waiting_on = {step: len(parents) for step, parents in rev_graph(graph).items()}
+    ready = [step for step, count in waiting_on.items() if count == 0]
+    running = {}
+    # Each run gets its own repos so concurrent runs never close or lock each other's
+    repos = _RepoCache()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while ready or running:
+                # Inputs are wired on this thread so `results` is only touched here.
+                while ready:
+                    step = ready.pop()
+                    params = config['chores'][step]
+                    name = params.pop('name')
+                    if step in to_skip:
+                        # If an ancestor of yours gave up you should give up.
+                        LOGGER.debug("Chore %s skipped because of parent", name)
+                        ready.extend(_release_children(step, graph, waiting_on))
+                        continue
+                    params.pop('type')
+                    params.pop(DEPENDENCY_KEY, None)
+                    if LOGGER.isEnabledFor(logging.DEBUG):
+                        LOGGER.debug('Feeding Inputs: %s(%s)', name, _to_kwargs(params))
+                        LOGGER.debug(results)
+                    chore = chores[step]
+                    params = wire_inputs(params, results, chore)
+                    if LOGGER.isEnabledFor(logging.INFO):
+                        LOGGER.info('Running: %s(%s)', name, _to_kwargs(params))
+                    running[executor.submit(_run_chore, chore, params, repos)] = (step, name)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step, name = running.pop(future)
+                    res, skipped = future.result()
+                    if skipped:
+                        # I decided to give up. All my descendants should give up.
+                        LOGGER.debug("Chore %s raised a ChoreSkippedException", name)
+                        to_skip.add(step)
+                        to_skip.update(children[step])
+                    results[name] = format_output(res)
+                    ready.extend(_release_children(step, graph, waiting_on))
+    finally:
+        repos.close()
     LOGGER.info("Chores %s skipped running.", to_skip)
     return results
 
@@ -4,8 +4,9 @@ import os
 import shutil
 import argparse
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
-from typing import List, Optional, Set
+from typing import List, Optional
 
 from baseline.utils import exporter, read_config_stream
 from mead.utils import convert_path
@@ -21,16 +22,6 @@ export = exporter(__all__)
 Cleaned = namedtuple('Cleaned', 'task_id cleaned_from_k8s purged_from_db removed_from_fs')
 
 
-def done(job: str, completed: Set[str]) -> str:
-    """Convert set membership into `Yes` for `No`.
-
-    :param job: The job to check if it was acted on
-    :param completed: The jobs acted on,
-    :returns: Yes or No
-    """
-    return 'Yes' if job in completed else 'No'
-
-
 @export
 def cleanup(
     work: str,
@@ -56,26 +47,36 @@ def cleanup(
     sched = sched if sched else KubernetesTaskManager(store)
     parent_details = store.get(work)
     children = list(chain(parent_details[Store.EXECUTED], parent_details[Store.EXECUTING]))
-    cleaned = set()
+    jobs = [work, *children]
     purged = set()
     removed = set()
-    if purge_fs:
-        if data_dir is None:
-            LOGGER.warning("Requested removal from the file system but no data directory provided.")
-        else:
-            shutil.rmtree(os.path.join(data_dir, work), ignore_errors=True)
-            removed = set(chain([work], children))
-    for job in children:
-        try:
-            sched.kill(job)
-            cleaned.add(job)
-        except:  # pylint: disable=bare-except
-            pass
-        if purge_db:
-            if store.remove(job):
-                purged.add(job)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # Removing a large data directory can take a while so do it while the jobs are being killed.
+        rmtree = None
+        if purge_fs:
+            if data_dir is None:
+                LOGGER.warning("Requested removal from the file system but no data directory provided.")
+            else:
+                rmtree = executor.submit(shutil.rmtree, os.path.join(data_dir, work), ignore_errors=True)
+        # Killing a job looks it up in the store so the jobs are only removed from the db after they are killed.
+        cleaned = sched.kill_many(children)
+        for job in children:
+            if purge_db:
+                if store.remove(job):
+                    purged.add(job)
+        if rmtree is not None:
+            rmtree.result()
+            removed = set(jobs)
     # Remove the work entry from the db last so if there is an error before hand we can still use the db entry.
     if purge_db:
         if store.remove(work):
             purged.add(work)
-    return [Cleaned(j, done(j, cleaned), done(j, purged), done(j, removed)) for j in chain([work], children)]
+    return [
+        Cleaned(
+            j,
+            'Yes' if j in cleaned else 'No',
+            'Yes' if j in purged else 'No',
+            'Yes' if j in removed else 'No',
+        )
+        for j in jobs
+    ]
@@ -4,16 +4,23 @@ import os
 import re
 import inspect
 import logging
+import secrets
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from string import Template
 from typing import Dict, Union, List, Tuple, Any, Optional
 import yaml
-import shortid
 from baseline.utils import listify, is_sequence
 from odin.dag import Graph
 
+# Pipeline files are plain data so use the safe loader, backed by libyaml when it is available
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
 
-SHORT_ID = shortid.ShortId()
 DEPENDENCY_KEY = 'depends'
 TASK_LIST = 'tasks'
 ROOT_PATH = 'ROOT_PATH'
@@ -26,7 +33,6 @@ TASK_IDS = 'TASK_IDS'
 TASK_ID = 'TASK_ID'
 TASK_NAME = 'TASK_NAME'
 K8S_NAME = re.compile(r"[a-z0-9-\.]+")
-REFERENCE_KEY = re.compile(r"^\^")
 
 
 LOGGER = logging.getLogger('odin')
@@ -42,7 +48,7 @@ def is_reference(key: Any) -> bool:
     :param key: A key to test
     :returns: `True` if its a reference
     """
-    return isinstance(key, str) and key.startswith('^')
+    return isinstance(key, str) and key[:1] == '^'
 
 
 def parse_reference(ref: str) -> Tuple[str, ...]:
@@ -53,9 +59,8 @@ def parse_reference(ref: str) -> Tuple[str, ...]:
     :param ref: A reference to parse
     :returns: A tuple based on dot splitting and removing the `^`
     """
-    parts = ref.split('.')
-    parts[0] = REFERENCE_KEY.sub("", parts[0])  # Remove beginning `^` if there.
-    return parts
+    # Remove beginning `^` if there before splitting
+    return (ref[1:] if ref[:1] == '^' else ref).split('.')
 
 
 def extract_outputs(path: List[str], results: Dict) -> Union[Any, List[Any]]:
@@ -74,6 +79,19 @@ def extract_outputs(path: List[str], results: Dict) -> Union[Any, List[Any]]:
     return results if not miss else None
 
 
+@lru_cache(maxsize=None)
+def _signature(chore: 'Chore') -> Tuple[inspect.Signature, Tuple[str, ...]]:
+    """Get the signature of a chore and the names of its params that don't have defaults.
+
+    `inspect.signature` is slow and chores are reused a lot so we only look each one up once.
+
+    :param chore: The chore function
+    :returns: The signature and the params without a default
+    """
+    sig = inspect.signature(chore)
+    return sig, tuple(param.name for param in sig.parameters.values() if param.default is param.empty)
+
+
 def wire_inputs(inputs: Dict, results: Dict, chore: 'Chore') -> Dict:
     """Replace the reference inputs with the output files.
 
@@ -100,21 +118,33 @@ def wire_inputs(inputs: Dict, results: Dict, chore: 'Chore') -> Dict:
             if is_reference(values):
                 inputs[key] = extract_outputs(parse_reference(values), results)
     # Get the signature of the function
-    sig = inspect.signature(chore)
+    sig, no_defaults = _signature(chore)
     # Bind the args we populated with inputs
     bound = sig.bind_partial(**inputs)
-    for param in sig.parameters.values():
-        # Look at all params and if they haven't been bound (they are not
-        # present in the bound args and therefore were not in inputs) default
-        # them to `None` in inputs. If this param has a default value we
-        # don't need to add it to inputs
-        if param.name not in bound.arguments and param.default is param.empty:
-            inputs[param.name] = None
+    for name in no_defaults:
+        # Look at all params without a default value and if they haven't been
+        # bound (they are not present in the bound args and therefore were not
+        # in inputs) default them to `None` in inputs.
+        if name not in bound.arguments:
+            inputs[name] = None
     return inputs
 
 
+def _task_name(task: Dict) -> str:
+    """Get the name a task was given in the pipeline file.
+
+    `read_pipeline_config` moves the original name to `_name`, so prefer that and
+    only fall back to `name` when it isn't there.
+
+    :param task: The task description
+    :returns: The name of the task
+    """
+    name = task.get('_name')
+    return name if name is not None else task.get('name')
+
+
 def create_graph(  # pylint: disable=too-many-nested-blocks,too-many-branches
-    task_list: List[Dict], external_inputs: Dict = {}
+    task_list: List[Dict], external_inputs: Optional[Dict] = None
 ) -> Graph:
     """Convert task list into a graph.
 
@@ -127,8 +157,9 @@ def create_graph(  # pylint: disable=too-many-nested-blocks,too-many-branches
     :raises ValueError: If a task name contains a `.` or there is a phantom dependency
     :returns: A DAG
     """
-    graph: Graph = defaultdict(set)
-    name2idx = {task.get('_name', task.get('name')): i for i, task in enumerate(task_list)}
+    external_inputs = external_inputs if external_inputs is not None else {}
+    graph: Graph = defaultdict(set, {i: set() for i in range(len(task_list))})
+    name2idx = {_task_name(task): i for i, task in enumerate(task_list)}
     idx2name = {i: k for k, i in name2idx.items()}
     for name in name2idx:
         if '.' in name:
@@ -138,24 +169,24 @@ def create_graph(  # pylint: disable=too-many-nested-blocks,too-many-branches
         if DEPENDENCY_KEY in task:
             for src in listify(task[DEPENDENCY_KEY]):
                 src = src[1:] if src.startswith('^') else src
-                if src not in name2idx:
+                src_idx = name2idx.get(src)
+                if src_idx is None:
                     raise ValueError(f"Dependency `{src}` of node `{idx2name[dst]}` not found in graph.")
-                graph[name2idx[src]].add(dst)
+                graph[src_idx].add(dst)
         for values in task.values():
-            values = listify(values)
+            # Check scalars directly rather than wrapping each one in a throwaway list
+            values = values if is_sequence(values) else (values,)
             for value in values:
                 if is_reference(value):
                     lookups = parse_reference(value)
                     src = lookups[0]
                     if src not in external_inputs:
-                        if src not in name2idx:
+                        src_idx = name2idx.get(src)
+                        if src_idx is None:
                             raise ValueError(f"Dependency `{src}` of node `{idx2name[dst]}` not found in graph.")
-                        graph[name2idx[src]].add(dst)
+                        graph[src_idx].add(dst)
                     else:
                         LOGGER.info("No dependency required in this graph from %s to %s", dst, src)
-    for dst in range(len(task_list)):
-        if dst not in graph:
-            graph[dst] = set()
     return graph
 
 
@@ -186,12 +217,13 @@ def _to_kwargs(params: Dict) -> str:
 
 
 def _generate_name(prefix: str) -> str:
-    """This generates a new name from the provided prefix suffixed by a shortid
+    """This generates a new name from the provided prefix suffixed by a short random id
 
     :param prefix: A provided prefix
-    :returns: A unique name that is a combination of the prefix and a shortid
+    :returns: A unique name that is a combination of the prefix and a short random id
     """
-    short_id = SHORT_ID.generate().lower().replace('_', '-')
+    # Lowercase hex is already a valid k8s name so it needs no cleanup
+    short_id = secrets.token_hex(4)
     return f'{prefix}-{short_id}j'
 
 
@@ -218,6 +250,24 @@ def _get_child_name(parent_name: str, name: str) -> str:
     return f'{parent_name}--{name}'
 
 
+def _make_dirs(run_dir: str, task_dirs: List[str], max_workers: int = 8) -> None:
+    """Create the directories for each task in a pipeline run.
+
+    The run dir is made first so the task dirs don't race to create it, then the
+    task dirs are made in parallel which helps on slow network filesystems.
+
+    :param run_dir: The directory of the pipeline run
+    :param task_dirs: The directories of the tasks, each inside of `run_dir`
+    :param max_workers: The maximum number of directories to create at the same time
+    """
+    os.makedirs(run_dir, exist_ok=True)
+    if not task_dirs:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(task_dirs))) as executor:
+        # Consume the results so any error creating a directory is raised here
+        list(executor.map(partial(os.makedirs, exist_ok=True), task_dirs))
+
+
 def read_pipeline_config(  # pylint: disable=too-many-locals
     work_dir: str,
     root_dir: str,
@@ -245,10 +295,10 @@ def read_pipeline_config(  # pylint: disable=too-many-locals
     if os.path.isfile(template_file):
         LOGGER.info("Loading file: %s", template_file)
         with open(template_file) as read_file:
-            flow = yaml.load(read_file, Loader=yaml.FullLoader)
+            flow = yaml.load(read_file, Loader=YamlLoader)
     else:
         LOGGER.info("Loading YAML string: ...%s", format(template_file[-20:]))
-        flow = yaml.load(template_file, Loader=yaml.FullLoader)
+        flow = yaml.load(template_file, Loader=YamlLoader)
     basename = flow.get('name', 'flow')
     if not validate_pipeline_name(basename):
         raise ValueError(f"Pipeline name must match {K8S_NAME.pattern}, got {basename}")
@@ -271,6 +321,7 @@ def read_pipeline_config(  # pylint: disable=too-many-locals
         RUN_PATH: run_dir,
     }
     task_names = set()
+    task_dirs = []
     for i in range(len(tasks)):
         task_name = tasks[i]['name']
         if task_name in task_names:
@@ -280,13 +331,18 @@ def read_pipeline_config(  # pylint: disable=too-many-locals
         context[TASK_ID] = child_job_ids[i]
         context[TASK_NAME] = task_name
         task_dir = os.path.join(run_dir, task_name)
-        os.makedirs(task_dir, exist_ok=True)
+        task_dirs.append(task_dir)
         context[TASK_PATH] = task_dir
         tasks[i]['_name'] = task_name
-        for j, arg in enumerate(tasks[i].get('args', [])):
-            tasks[i]['args'][j] = Template(arg).substitute(context)
-            if arg != tasks[i]['args'][j]:
-                LOGGER.info("Interpolated: %s", tasks[i]['args'][j])
+        args = tasks[i].get('args', [])
+        for j, arg in enumerate(args):
+            # Only args with a placeholder can change so skip building a template for the rest
+            if '$' not in arg:
+                continue
+            args[j] = Template(arg).substitute(context)
+            if arg != args[j]:
+                LOGGER.info("Interpolated: %s", args[j])
+    _make_dirs(run_dir, task_dirs)
 
     del context[TASK_ID]
     del context[TASK_NAME]
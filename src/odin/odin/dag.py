@@ -1,27 +1,36 @@
 """Provides DAG functionality used by chores and k8s job sched
 """
 from collections import defaultdict
-from copy import deepcopy
-from itertools import chain
-from typing import DefaultDict, Set, List, NewType, Union
-from cachetools import cached
-from cachetools.keys import hashkey
+from typing import DefaultDict, Dict, Iterator, Set, List, NewType, Union
 
 
 Node = NewType('Node', Union[str, int])
 Graph = NewType('Graph', DefaultDict[Node, Set[Node]])
 
+WRITE_BUFFER_SIZE = 128 * 1024
+
 
 def topo_sort(froms: Graph) -> List[Node]:
     """Sort a graph where there is an edge from each key to their values.
 
     :param froms: A Graph where there exists a directed edge from k to each
         v in Graph[k], k -> v
-
+    :raises ValueError: If the graph has a cycle in it.
     :returns: A list of nodes
     """
-    tos = rev_graph(froms)
-    return topo_sort_kahn(deepcopy(froms), tos)
+    in_degree = _in_degrees(froms)
+    sort = []
+    no_ins = [nd for nd, degree in in_degree.items() if not degree]
+    while no_ins:
+        nd = no_ins.pop()
+        sort.append(nd)
+        for nd2 in froms.get(nd, ()):
+            in_degree[nd2] -= 1
+            if not in_degree[nd2]:
+                no_ins.append(nd2)
+    if len(sort) != len(in_degree):
+        raise ValueError('Graph has a cycle')
+    return sort
 
 
 def topo_sort_parallel(froms: Graph) -> List[Set[Node]]:
@@ -33,56 +42,49 @@ def topo_sort_parallel(froms: Graph) -> List[Set[Node]]:
     :returns: A list of sets of nodes where each node in a set can be
         executed in parallel.
     """
-    tos = rev_graph(froms)
-    return _topo_sort_parallel(tos)
+    return _topo_sort_parallel(froms)
 
 
-def topo_sort_kahn(froms: Graph, tos: Graph) -> List[Node]:
-    """Do a topological sort with Kahn's algo.
+def _in_degrees(froms: Graph) -> Dict[Node, int]:
+    """Count the incoming edges of each node in one pass over the edges.
 
     :param froms: A Graph where there exists a directed edge from k to each
         v in Graph[k], k -> v
-    :param tos: A Graph where there exists a directed edge from each value
-        v in Graph[k] to k, v -> k
-    :raises ValueError: If the graph has a cycle in it.
-    :returns: The list of nodes in topological order.
+    :returns: A map from every node in the graph to its number of incoming edges.
     """
-    sort = []
-    no_ins = set(nd for nd in chain(tos, froms) if not tos[nd])
-    while no_ins:
-        nd = no_ins.pop()
-        sort.append(nd)
-        for nd2 in froms[nd]:
-            tos[nd2].discard(nd)
-            if not tos[nd2]:
-                no_ins.add(nd2)
-        froms[nd] = set()
-    for ed in froms.values():
-        if ed:
-            raise ValueError('Graph has a cycle')
-    return sort
+    in_degree = {}
+    for nd, eds in froms.items():
+        in_degree.setdefault(nd, 0)
+        for ed in eds:
+            in_degree[ed] = in_degree.get(ed, 0) + 1
+    return in_degree
 
 
 class CycleError(ValueError):
     """An error class to use if the DAG has a cycle in it."""
 
 
-def _topo_sort_parallel(tos: Graph) -> List[Set[Node]]:
+def _topo_sort_parallel(froms: Graph) -> List[Set[Node]]:
     """Do a topological sort that returns sets of parallel possible jobs.
 
-    :param tos: A Graph where there exists a directed edge from each value
-        v in Graph[k] to k, v -> k
+    :param froms: A Graph where there exists a directed edge from k to each
+        v in Graph[k], k -> v
     :raises CycleError: If the graph has a cycle in it.
     :returns: A list of sets where each set can be run in parallel.
     """
+    in_degree = _in_degrees(froms)
     sort = []
-    while True:
-        no_ins = set(n for n, pre in tos.items() if not pre)
-        if not no_ins:
-            break
+    no_ins = set(n for n, degree in in_degree.items() if not degree)
+    while no_ins:
         sort.append(no_ins)
-        tos = {n: pre - no_ins for n, pre in tos.items() if n not in no_ins}
-    if tos:
+        next_no_ins = set()
+        for nd in no_ins:
+            for nd2 in froms.get(nd, ()):
+                in_degree[nd2] -= 1
+                if not in_degree[nd2]:
+                    next_no_ins.add(nd2)
+        no_ins = next_no_ins
+    if any(in_degree.values()):
         raise CycleError('Graph has a cycle')
     return sort
 
@@ -90,29 +92,51 @@ def _topo_sort_parallel(tos: Graph) -> List[Set[Node]]:
 def find_children(froms: Graph) -> DefaultDict[Node, Set[Node]]:
     """Find all the children of all nodes.
 
+    Nodes are finished in post-order so the children of a node are collected
+    from the already finished sets of its direct children, visiting each node once.
+
     :param froms: A graph where there is an edge from each k to each value v
         in graph[k], k -> v
 
     :returns: A map for nodes to children.
     """
-    return defaultdict(set, {n: _find_children(froms, n) for n in froms})
+    children = defaultdict(set)
+    for node in _post_order(froms):
+        descendents = children[node]
+        for child in froms.get(node, ()):
+            descendents.add(child)
+            descendents.update(children.get(child, ()))
+    return children
+
 
+def _post_order(froms: Graph) -> List[Node]:
+    """Order the nodes of a graph so each node comes after all of its children.
 
-# The graph is unhashable so we need to stringify it so we can cache it.
-@cached(cache={}, key=lambda froms, root: (hashkey(str(froms)), hashkey(root)))
-def _find_children(froms: Graph, root: Node) -> Set[Node]:
-    """Find all the children of some node.
+    If the graph has a cycle the order is only partial, cycles are reported by the topological sorts.
 
     :param froms: A graph where there is an edge from each k to each value v
         in graph[k], k -> v
-    :param root: The node to collect the children from.
 
-    :returns: The children of `root`
+    :returns: The nodes reachable from the keys of `froms` in post-order.
     """
-    descendents = set(froms[root])
-    for child in froms[root]:
-        descendents.update(_find_children(froms, child))
-    return descendents
+    order = []
+    seen = set()
+    for root in froms:
+        if root in seen:
+            continue
+        seen.add(root)
+        stack = [(root, iter(froms.get(root, ())))]
+        while stack:
+            node, kids = stack[-1]
+            for kid in kids:
+                if kid not in seen:
+                    seen.add(kid)
+                    stack.append((kid, iter(froms.get(kid, ()))))
+                    break
+            else:
+                stack.pop()
+                order.append(node)
+    return order
 
 
 def rev_graph(graph: Graph) -> Graph:
@@ -129,31 +153,49 @@ def rev_graph(graph: Graph) -> Graph:
     return r_graph
 
 
-def dot_graph(froms: Graph) -> str:
-    """Convert a graph into a dot string.
+def _dot_lines(froms: Graph) -> Iterator[str]:
+    """Generate the lines of a graph in dot format.
 
     :param froms: A Graph where there exists a directed edge from k to each
         v in Graph[k], k -> v
-    :returns: A dot string representing the graph
+    :returns: The lines of the dot representation, without newlines
     """
-    lines = ['digraph {']
+    names = {}
+
+    def name(nd: Node) -> str:
+        """Make a node name dot safe, each node is only converted once."""
+        if nd not in names:
+            names[nd] = str(nd).replace('-', '_')
+        return names[nd]
+
+    yield 'digraph {'
     for nd, eds in froms.items():
-        nd = str(nd).replace('-', '_')
+        src = name(nd)
         if not eds:
-            lines.append(f"  {nd};")
+            yield f"  {src};"
         for ed in eds:
-            ed = str(ed)
-            lines.append(f"  {nd} -> {ed.replace('-', '_')};")
-    lines.append("}")
-    return "\n".join(lines)
+            yield f"  {src} -> {name(ed)};"
+    yield "}"
+
+
+def dot_graph(froms: Graph) -> str:
+    """Convert a graph into a dot string.
+
+    :param froms: A Graph where there exists a directed edge from k to each
+        v in Graph[k], k -> v
+    :returns: A dot string representing the graph
+    """
+    return "\n".join(_dot_lines(froms))
 
 
 def write_graph(froms: Graph, file_name: str) -> None:
     """Write a graph to file in dot format.
 
+    The lines are streamed to the file so the whole dot string is never built in memory.
+
     :param froms: A Graph where there exists a directed edge from k to each
         v in Graph[k], k -> v
     :param file_name: A file name to write to
     """
-    with open(file_name, 'w') as write_file:
-        write_file.write(dot_graph(froms))
+    with open(file_name, 'w', buffering=WRITE_BUFFER_SIZE) as write_file:
+        write_file.writelines(f'{line}\n' for line in _dot_lines(froms))
@@ -1,56 +1,141 @@
 """Pipeline primitive
 """
 import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-import json
+from functools import partial
 import logging
-from hashlib import sha1
 from itertools import chain
-from typing import Dict, List, Optional, Union, AsyncIterator, Any
+from typing import Dict, List, Optional, Tuple, Union, AsyncIterator, Any, Awaitable
 from eight_mile.utils import listify
-from mead.utils import order_json
 from odin.core import create_graph, is_reference, parse_reference, extract_outputs, _get_child_name
 from odin.dag import topo_sort_parallel, dot_graph, CycleError
 from odin.k8s import Task, TaskManager, KubernetesTaskManager, StatusType, SubmitError
 from odin.store import Store, Cache, MemoryCache
-from odin.utils.hash import hash_files, hash_args
+from odin.utils.hash import hash_files, hash_args, cache_key, new_hasher
 
 LOGGER = logging.getLogger('odin')
+# Shared by every call to `hash_outputs` so hashing a batch of tasks doesn't start a pool per task
+HASH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='odin-hash')
 
 
-def hash_outputs(outputs: Dict[str, Union[str, List[str]]]) -> str:
+def hash_outputs(
+    outputs: Dict[str, Union[str, List[str]]],
+    cache: Optional[Cache] = None,
+    file_hashes: Optional[Dict[str, Future]] = None,
+) -> str:
     """Hash the outputs of a task.
 
     :param outputs: The list of output files to hash.
+    :param cache: A cache to reuse the hashes of unchanged files from.
+    :param file_hashes: The file hashes shared with the other tasks being hashed at the same time.
     :returns: The hash of the outputs.
     """
     LOGGER.debug("Hashing %s", outputs)
-    output_hashes = {k: hash_files(listify(v)) for k, v in outputs.items()}
-    LOGGER.debug(output_hashes)
-    out_hash = sha1(json.dumps(order_json(output_hashes)).encode('utf-8')).hexdigest()
+    hasher = new_hasher()
+    if outputs:
+        keys = sorted(outputs)
+        # hashlib releases the GIL on large updates so each output can be hashed in its own thread
+        hash_output = partial(hash_files, cache=cache, file_hashes=file_hashes)
+        hashes = HASH_POOL.map(lambda key: hash_output(listify(outputs[key])), keys)
+        # Each key and digest is followed by a NUL, which can't show up in either, so the
+        # boundaries between outputs are unambiguous
+        for key, output_hash in zip(keys, hashes):
+            LOGGER.debug("Output %s hash: %s", key, output_hash)
+            hasher.update(key.encode('utf-8'))
+            hasher.update(b'\0')
+            hasher.update(output_hash.encode('utf-8'))
+            hasher.update(b'\0')
+    out_hash = cache_key(hasher.hexdigest())
     LOGGER.debug("Output hash: %s", out_hash)
     return out_hash
 
 
-async def hash_inputs(task: Task, sched: TaskManager) -> str:
+def hash_containers(task: Task, sched: TaskManager, container_hashes: Optional[Dict] = None) -> Awaitable[List[str]]:
+    """Get the container hashes of a task, sharing the lookup between tasks that use the same image.
+
+    Looking up the hashes means spinning up a copy of the task on the cluster so tasks that run the
+    same image share a single lookup. Images that are always pulled are looked up every time because
+    the image behind the tag can change.
+
+    :param task: The Task that will be run.
+    :param sched: The scheduler, needed to get the container hashes.
+    :param container_hashes: The lookups that have already been started, keyed by image.
+    :returns: An awaitable of the hashes for the containers in the task.
+    """
+    if container_hashes is None or task.pull_policy == 'Always':
+        return sched.hash_task(task)
+    key = (task.image, task.resource_type, task.pull_policy)
+    if key not in container_hashes:
+        container_hashes[key] = asyncio.ensure_future(sched.hash_task(task))
+    return container_hashes[key]
+
+
+async def hash_inputs(
+    task: Task,
+    sched: TaskManager,
+    container_hashes: Optional[Dict] = None,
+    cache: Optional[Cache] = None,
+    file_hashes: Optional[Dict[str, Future]] = None,
+) -> str:
     """Hash all things that are inputs to a task, the containers, the arguments, and input data.
 
     :param task: The Task that will be run.
     :param sched: The scheduler, needed to get the container hashes.
+    :param container_hashes: The container hash lookups to share between the tasks of a pipeline.
+    :param cache: A cache to reuse the hashes of unchanged files from.
+    :param file_hashes: The file hashes shared with the other tasks being hashed at the same time.
     :returns: The hash that describes the inputs to the Task.
     """
     LOGGER.debug("Hashing inputs for %s", task.name)
     arg_hash = hash_args(task.command, task.args)
     LOGGER.debug("Argument hash: %s", arg_hash)
-    container_hash = await sched.hash_task(task)
+    if task.inputs is not None:
+        # Hash the input data in a thread so it overlaps with looking up the container hashes
+        container_hash, input_hash = await asyncio.gather(
+            hash_containers(task, sched, container_hashes),
+            asyncio.get_event_loop().run_in_executor(
+                None, partial(hash_files, task.inputs, cache=cache, file_hashes=file_hashes)
+            ),
+        )
+    else:
+        container_hash = await hash_containers(task, sched, container_hashes)
+        input_hash = ""
     LOGGER.debug("Container hash: %s", container_hash)
-    input_hash = hash_files(task.inputs) if task.inputs is not None else ""
     LOGGER.debug("Input data hash: %s", input_hash)
-    full_hash = sha1(f"{arg_hash}{''.join(container_hash)}{input_hash}".encode('utf-8')).hexdigest()
+    # Feed the parts in one at a time rather than building them into a single string first
+    hasher = new_hasher(arg_hash.encode('utf-8'))
+    for part in container_hash:
+        hasher.update(part.encode('utf-8'))
+    hasher.update(input_hash.encode('utf-8'))
+    full_hash = cache_key(hasher.hexdigest())
     LOGGER.debug("Full input hash: %s", full_hash)
     return full_hash
 
 
+async def hash_task_io(
+    task: Task,
+    sched: TaskManager,
+    container_hashes: Optional[Dict] = None,
+    cache: Optional[Cache] = None,
+    file_hashes: Optional[Dict[str, Future]] = None,
+) -> Tuple[str, str]:
+    """Hash the inputs and the current outputs of a task, used to check if it is cached.
+
+    :param task: The Task that will be run.
+    :param sched: The scheduler, needed to get the container hashes.
+    :param container_hashes: The container hash lookups to share between the tasks of a pipeline.
+    :param cache: A cache to reuse the hashes of unchanged files from.
+    :param file_hashes: The file hashes shared with the other tasks being hashed at the same time.
+    :returns: The hash of the inputs and the hash of the outputs.
+    """
+    in_hash = await hash_inputs(task, sched, container_hashes, cache, file_hashes)
+    out_hash = await asyncio.get_event_loop().run_in_executor(
+        None, partial(hash_outputs, task.outputs, cache=cache, file_hashes=file_hashes)
+    )
+    return in_hash, out_hash
+
+
 class PipelineStatus:
     """Enum of pipeline status.
 
@@ -125,6 +210,9 @@ class Executor:
             one part of it.
         :returns: The input with references replaced with the data from the job store.
         """
+        # Without a `{` there are no spans to substitute so skip scanning the string (most args)
+        if '{' not in reference:
+            return self.extract_outputs(pipeline_id, reference) if is_reference(reference) else reference
         starts = []
         new_ref = []
         for i, char in enumerate(reference):
@@ -142,7 +230,7 @@ class Executor:
                 if not starts:
                     to_sub = reference[start:i]
                     # Recursively substitute in the open span
-                    sub = self.rewrite_references(pipeline_id, reference[start:i])
+                    sub = self.rewrite_references(pipeline_id, to_sub)
                     # If this open span wasn't a real substitution add the `{` and `}` back
                     if sub == to_sub:
                         sub = f"{{{sub}}}"
@@ -163,6 +251,24 @@ class Executor:
         # If the whole thing isn't a reference just return as is (with possible sub references subsituted)
         return reference
 
+    def _prepare_task(self, pipeline_id: str, task: Task, task_entry: Dict) -> Task:
+        """Replace the references in the inputs and args of a task with values generated by previous tasks.
+
+        :param pipeline_id: The id of the pipeline that is currently running.
+        :param task: The task to rewrite, it is updated in place.
+        :param task_entry: The job store entry of the task, updated to match the rewritten task.
+        :returns: The rewritten task.
+        """
+        task.inputs = (
+            [self.rewrite_references(pipeline_id, task_input) for task_input in task.inputs]
+            if task.inputs is not None
+            else None
+        )
+        task.args = [self.rewrite_references(pipeline_id, a) for a in task.args]
+        task_entry['args'] = task.args
+        task_entry['inputs'] = task.inputs
+        return task
+
     async def run(  # pylint: disable=too-many-locals,too-many-statements,too-many-branches,missing-yield-type-doc
         self, my_id: str, task_id: str, rev_ver: str, tasks: List[Dict]
     ) -> AsyncIterator[str]:
@@ -184,7 +290,8 @@ class Executor:
         """
         try:
             graph = create_graph(tasks)
-            named_graph = {tasks[k]['name']: [tasks[v]['name'] for v in vs] for k, vs in graph.items()}
+            task_names = [task['name'] for task in tasks]
+            named_graph = {task_names[k]: [task_names[v] for v in vs] for k, vs in graph.items()}
             LOGGER.info(dot_graph(named_graph))
             groups = topo_sort_parallel(graph)
         except (KeyError, ValueError, CycleError) as exc:
@@ -218,94 +325,143 @@ class Executor:
                 Store.ERROR_MESSAGE: None,
             }
         )
-        task_list = []
-        waiting = []
-
-        for group in groups:
-            task_group = []
-            waiting_group = []
-            for task in group:
-                child_task_id = tasks[task]['name']
-                task_obj = Task.from_dict(tasks[task])
-                task_entry = Executor._task_to_entry(my_id, child_task_id, tasks[task]['_name'], task_obj)
-                self.store.set(task_entry)
-                task_group.append(task_obj)
-                waiting_group.append(child_task_id)
-            task_list.append(task_group)
-            waiting.append(waiting_group)
+        # Container digests don't change while the pipeline runs so only look each image up once
+        container_hashes = {}
+        # Nothing else writes to a task's entry until it runs so keep them around rather than reading them back
+        task_entries = {}
+        task_objs = {}
+        for task in chain(*groups):
+            task_dict = tasks[task]
+            task_obj = Task.from_dict(task_dict)
+            task_objs[task] = task_obj
+            task_entries[task_obj.name] = Executor._task_to_entry(my_id, task_obj.name, task_dict['_name'], task_obj)
+        self.store.set_many(list(task_entries.values()))
 
         my_status = self.store.get(my_id)
         my_status['status'] = PipelineStatus.RUNNING
-        all_tasks = list(chain(*waiting))
-        my_status[Store.WAITING] = all_tasks
+        all_tasks = [task_obj.name for task_obj in task_objs.values()]
+        my_status[Store.WAITING] = list(all_tasks)
         my_status[Store.JOBS] = all_tasks
         self.store.set(my_status)
 
-        for task_group in task_list:
-            # We are about to move this first set from waiting to executing so remove it from waiting.
-            waiting.pop(0)
-            # Last rounds tasks are still in the EXECUTING state so set them to EXECUTED
-            if my_status[Store.EXECUTING]:
-                my_status[Store.EXECUTED].extend(my_status[Store.EXECUTING])
-            my_status[Store.EXECUTING] = [task_obj.name for task_obj in task_group]
-            my_status[Store.WAITING] = list(chain(*waiting))
-            self.store.set(my_status)
-
-            running = []
-            for task_obj in task_group:
-                # Replace inputs and args with values generated by previous tasks
-                task_obj.inputs = (
-                    [self.rewrite_references(my_id, task_input) for task_input in task_obj.inputs]
-                    if task_obj.inputs is not None
-                    else None
+        # A task is ready as soon as all of its parents are done, not when the whole previous group is
+        parents_left = {task: 0 for task in task_objs}
+        for children in graph.values():
+            for child in children:
+                parents_left[child] += 1
+        ready = [task for task in task_objs if not parents_left[task]]
+        in_hashes = {}
+        waits = {}
+
+        def finished(task: int) -> None:
+            """Mark a task as done and queue any children that have no other parents left."""
+            for child in graph[task]:
+                parents_left[child] -= 1
+                if not parents_left[child]:
+                    ready.append(child)
+
+        async def cancel_waits() -> None:
+            """Stop waiting on the tasks that are still running, they would otherwise outlive the pipeline."""
+            for future in waits:
+                future.cancel()
+            await asyncio.gather(*waits, return_exceptions=True)
+
+        while waits or (ready and my_status[Store.STATUS] is PipelineStatus.RUNNING):
+            if ready and my_status[Store.STATUS] is PipelineStatus.RUNNING:
+                task_group = [task_objs[task] for task in ready]
+                started = ready
+                ready = []
+                # Filter the waiting list once per batch rather than a list.remove for each task
+                started_names = {task_obj.name for task_obj in task_group}
+                my_status[Store.WAITING] = [name for name in my_status[Store.WAITING] if name not in started_names]
+                my_status[Store.EXECUTING].extend(task_obj.name for task_obj in task_group)
+                self.store.set(my_status)
+
+                # Rewriting reads from the store so do it in threads to keep the event loop free
+                loop = asyncio.get_event_loop()
+                await asyncio.gather(
+                    *(
+                        loop.run_in_executor(None, self._prepare_task, my_id, task_obj, task_entries[task_obj.name])
+                        for task_obj in task_group
+                    )
                 )
-                task_obj.args = [self.rewrite_references(my_id, a) for a in task_obj.args]
-                task_entry = self.store.get(task_obj.name)
-                task_entry['args'] = task_obj.args
-                task_entry['inputs'] = task_obj.inputs
-                self.store.set(task_entry)
+                self.store.set_many([task_entries[task_obj.name] for task_obj in task_group])
+
+                # The ready tasks don't depend on each other so hash them all at the same
+                # time, a slow container lookup for one task doesn't hold up the rest
+                hashed = [task_obj for task_obj in task_group if task_obj.outputs is not None]
+                # Siblings often share inputs so each file is only read once per batch, a fresh
+                # dict per batch keeps files that change between batches from going stale
+                file_hashes = {}
+                try:
+                    hashes = await asyncio.gather(
+                        *(
+                            hash_task_io(task_obj, self.sched, container_hashes, self.cache, file_hashes)
+                            for task_obj in hashed
+                        )
+                    )
+                except SubmitError as exc:
+                    my_status[Store.STATUS] = PipelineStatus.TERMINATED
+                    my_status[Store.ERROR_MESSAGE] = str(exc)
+                    self.store.set(my_status)
+                    await cancel_waits()
+                    yield f"Pipeline {my_id} terminated"
+                    raise exc
+                in_hashes.update((task_obj.name, in_hash) for task_obj, (in_hash, _) in zip(hashed, hashes))
+                out_hashes = {task_obj.name: out_hash for task_obj, (_, out_hash) in zip(hashed, hashes)}
+
+                # Record all the cache hits of the batch with one write for the tasks and one for the pipeline
+                to_submit = []
+                cached = []
+                for task, task_obj in zip(started, task_group):
+                    if task_obj.outputs is not None:
+                        prev_hash = self.cache[in_hashes[task_obj.name]]
+                        if out_hashes[task_obj.name] == prev_hash:
+                            LOGGER.info("%s is cached and will not be run", task_obj.name)
+                            task_entries[task_obj.name].update({Store.RESOURCE_ID: Store.CACHED})
+                            cached.append(task_obj.name)
+                            # The children of a cached task can start right away
+                            finished(task)
+                            continue
+                        LOGGER.info("Hash of outputs for %s doesn't match stored hash, re-running.", task_obj.name)
+                    to_submit.append((task, task_obj))
+                if cached:
+                    self.store.set_many([task_entries[name] for name in cached])
+                    cached_names = set(cached)
+                    my_status[Store.EXECUTING] = [
+                        name for name in my_status[Store.EXECUTING] if name not in cached_names
+                    ]
+                    my_status[Store.EXECUTED].extend(cached)
+                    self.store.set(my_status)
 
-                if task_obj.outputs is not None:
+                for task, task_obj in to_submit:
+                    LOGGER.info("Submitting %s", task_obj.name)
+                    yield f"Submitting {task_obj.name}"
                     try:
-                        in_hash = await hash_inputs(task_obj, self.sched)
+                        resource_id = self.sched.submit(task_obj)
                     except SubmitError as exc:
                         my_status[Store.STATUS] = PipelineStatus.TERMINATED
                         my_status[Store.ERROR_MESSAGE] = str(exc)
                         self.store.set(my_status)
+                        await cancel_waits()
                         yield f"Pipeline {my_id} terminated"
                         raise exc
-                    out_hash = hash_outputs(task_obj.outputs)
-                    prev_hash = self.cache[in_hash]
-                    if out_hash == prev_hash:
-                        LOGGER.info("%s is cached and will not be run", task_obj.name)
-                        task_status = self.store.get(task_obj.name)
-                        task_status.update({Store.RESOURCE_ID: Store.CACHED})
-                        self.store.set(task_status)
-                        my_status[Store.EXECUTING].remove(task_obj.name)
-                        my_status[Store.EXECUTED].append(task_obj.name)
-                        self.store.set(my_status)
-                        continue
-                    LOGGER.info("Hash of outputs for %s doesn't match stored hash, re-running.", task_obj.name)
-                LOGGER.info("Submitting %s", task_obj.name)
-                yield f"Submitting {task_obj.name}"
-                try:
-                    resource_id = self.sched.submit(task_obj)
-                except SubmitError as exc:
-                    my_status[Store.STATUS] = PipelineStatus.TERMINATED
-                    my_status[Store.ERROR_MESSAGE] = str(exc)
-                    self.store.set(my_status)
-                    yield f"Pipeline {my_id} terminated"
-                    raise exc
 
-                task_status = self.store.get(task_obj.name)
-                task_status.update({Store.RESOURCE_ID: resource_id, Store.SUBMIT_TIME: datetime.utcnow()})
-                self.store.set(task_status)
-                running.append(task_obj)
+                    task_status = task_entries[task_obj.name]
+                    task_status.update({Store.RESOURCE_ID: resource_id, Store.SUBMIT_TIME: datetime.utcnow()})
+                    self.store.set(task_status)
+                    waits[asyncio.ensure_future(self.sched.wait_for(task_obj))] = task
+                continue
 
-            # This processes jobs in the order they finish, we should eventually
-            # be able to kill the other jobs if one gets terminated.
-            for future in asyncio.as_completed(map(self.sched.wait_for, running)):
-                task_obj = await future
+            # This processes jobs in the order they finish, if one of them fails the rest are killed
+            done, _ = await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                task = waits.pop(future)
+                try:
+                    task_obj = future.result()
+                except Exception:
+                    await cancel_waits()
+                    raise
                 LOGGER.info("Done running %s", task_obj.name)
                 yield f"Done running {task_obj.name}"
                 task_status = self.store.get(task_obj.name)
@@ -334,18 +490,24 @@ class Executor:
 
                 if task_obj.outputs is not None:
                     LOGGER.info("Saving the hash of %s's output", task_obj.name)
-                    self.cache[in_hash] = hash_outputs(task_obj.outputs)
-            if my_status[Store.STATUS] is PipelineStatus.DONE or my_status[Store.STATUS] is PipelineStatus.TERMINATED:
-                if my_status[Store.STATUS] == PipelineStatus.TERMINATED:
-                    yield f"Pipeline: {my_id} Terminated"
-                waiting = []
-                break
+                    # Hash in a thread so the other running tasks and newly ready children aren't held up
+                    self.cache[in_hashes[task_obj.name]] = await asyncio.get_event_loop().run_in_executor(
+                        None, partial(hash_outputs, task_obj.outputs, cache=self.cache)
+                    )
+                finished(task)
+
+            if waits and my_status[Store.STATUS] is PipelineStatus.TERMINATED:
+                await cancel_waits()
+                killed = self.sched.kill_many([task_objs[task] for task in waits.values()])
+                LOGGER.info("Killed %s after the pipeline terminated", ", ".join(sorted(killed)))
+                waits = {}
 
+        if my_status[Store.STATUS] is PipelineStatus.TERMINATED:
+            yield f"Pipeline: {my_id} Terminated"
         my_status[Store.COMPLETION_TIME] = datetime.utcnow()
         if my_status[Store.EXECUTING] and my_status[Store.STATUS] != PipelineStatus.TERMINATED:
             my_status[Store.EXECUTED].extend(my_status[Store.EXECUTING])
             my_status[Store.EXECUTING] = []
-        assert not waiting
 
         if my_status[Store.STATUS] != PipelineStatus.TERMINATED:
             my_status[Store.STATUS] = PipelineStatus.DONE
@@ -5,10 +5,9 @@ import getpass
 import inspect
 import logging
 import os
-import re
 import stat
 import shutil
-from copy import deepcopy
+from functools import lru_cache
 from itertools import chain
 from typing import Dict, Union, Optional, List, Tuple, Any
 
@@ -24,6 +23,57 @@ IF_NOT_PRESENT = 'IfNotPresent'
 NEVER = 'Never'
 
 
+def _load_template(template_loc: str, name: str) -> Any:
+    """Read a file from the template directory, a file is only parsed again after it changes on disk.
+
+    The cache is keyed on the modification time so a long running server picks up edited templates.
+    The result is shared between every caller so it must never be changed in place, the
+    `generate_*_task` functions fill in a `_clone_template` copy instead.
+
+    :param template_loc: The directory the templates live in.
+    :param name: The name of the template file.
+    :returns: The parsed template.
+    """
+    file_name = os.path.join(template_loc, name)
+    try:
+        mtime = os.stat(file_name).st_mtime_ns
+    except OSError:
+        # Let the reader report the missing file
+        mtime = None
+    return _parse_template(file_name, mtime)
+
+
+@lru_cache(maxsize=64)
+def _parse_template(file_name: str, mtime: Optional[int]) -> Any:
+    """Parse a template file, the modification time is only used as part of the cache key.
+
+    :param file_name: The template file.
+    :param mtime: The modification time of the file in nanoseconds.
+    :returns: The parsed template.
+    """
+    return read_config_file(file_name)
+
+
+def _clone_template(template: Dict) -> Dict:
+    """Copy a task template so filling it in doesn't change the original.
+
+    Templates are shallow, their values are strings, lists of strings like `args`, or small
+    dicts like `mount`. So only the containers are copied along with the dicts inside of lists
+    like `mounts`, this is much cheaper than a `deepcopy`.
+
+    :param template: The template to copy.
+    :returns: A copy that can be updated in place.
+    """
+    clone = {}
+    for key, value in template.items():
+        if isinstance(value, list):
+            value = [dict(v) if isinstance(v, dict) else v for v in value]
+        elif isinstance(value, dict):
+            value = dict(value)
+        clone[key] = value
+    return clone
+
+
 def set_permissions(file_name: str) -> None:
     """Update permissions on a file to be rw-rw-rw-
 
@@ -65,7 +115,7 @@ def generate_mead_task(  # pylint: disable=too-many-locals
     :returns:
         Dict, The task that runs a mead job in an odin pipeline.
     """
-    template = deepcopy(template)
+    template = _clone_template(template)
 
     template['name'] = task_name
     template['image'] = mead_image
@@ -74,7 +124,7 @@ def generate_mead_task(  # pylint: disable=too-many-locals
     template['pull_policy'] = pull_policy
 
     if depends:
-        template['depends'] = deepcopy(listify(depends))
+        template['depends'] = list(listify(depends))
 
     # Update the config location.
     config_idx = template['args'].index('--config') + 1
@@ -127,7 +177,7 @@ def generate_hpctl_task(
     :returns: The task definition
     """
     addons = addons if addons is not None else []
-    template = deepcopy(template)
+    template = _clone_template(template)
 
     template['name'] = name
     template['image'] = image
@@ -135,7 +185,7 @@ def generate_hpctl_task(
     template['pull_policy'] = pull_policy
 
     # Update the config location
-    template['args'][0] = re.sub(r"{{sample-config}}", config_file, template['args'][0])
+    template['args'][0] = template['args'][0].replace("{{sample-config}}", config_file)
 
     for model in models:
         template['args'].append(model)
@@ -171,7 +221,7 @@ def generate_template_task(
     :returns: The template file and the output file name.
     """
 
-    template = deepcopy(template)
+    template = _clone_template(template)
     template['image'] = image
     template['mount']['claim'] = claim
     template['pull_policy'] = pull_policy
@@ -179,12 +229,12 @@ def generate_template_task(
     template['name'] = f'template-{task}'
 
     if depends:
-        template['depends'] = deepcopy(listify(depends))
+        template['depends'] = list(listify(depends))
 
     template['args'][0] = template_file
 
     output_idx = template['args'].index('--output') + 1
-    template['args'][output_idx] = re.sub(r"{{task}}", task, template['args'][output_idx])
+    template['args'][output_idx] = template['args'][output_idx].replace("{{task}}", task)
 
     template['args'][template['args'].index('--task') + 1] = task
 
@@ -205,14 +255,14 @@ def generate_chore_task(
     :returns:
         Dict, The task that will run a single chore file in an odin pipeline.
     """
-    template = deepcopy(template)
+    template = _clone_template(template)
 
     template['image'] = odin_image
     template['mount']['claim'] = claim
     template['pull_policy'] = pull_policy
 
     if depends:
-        template['depends'] = deepcopy(listify(depends))
+        template['depends'] = list(listify(depends))
 
     return template
 
@@ -247,7 +297,7 @@ def generate_chore_yaml(
         if slack_web_hook is not None:
             slack_chore['webhook'] = slack_web_hook
         if git_depends:
-            slack_chore['depends'] = deepcopy(listify(slack_chore.get('depends', [])) + git_depends)
+            slack_chore['depends'] = listify(slack_chore.get('depends', [])) + git_depends
         chores.append(slack_chore)
     if selected:
         selected_chore = read_config_file(os.path.join(template_loc, 'selected-chore.yml'))
@@ -288,20 +338,19 @@ def generate_eval_task(  # pylint: disable=too-many-locals
     """
     depends = listify(depends)
     idempotent_append(eval_task, depends)
-    config = deepcopy(config)
-    template = deepcopy(template)
+    template = _clone_template(template)
     template['name'] = task_name
     template['image'] = image
     template['mount']['claim'] = claim
     template['pull_policy'] = pull_policy
-    template['depends'] = deepcopy(depends)
+    template['depends'] = list(depends)
 
     model_idx = template['args'].index('--model') + 1
-    template['args'][model_idx] = re.sub(r"{{eval-task}}", eval_task, template['args'][model_idx])
+    template['args'][model_idx] = template['args'][model_idx].replace("{{eval-task}}", eval_task)
 
     # Point this at the bundle created by the mead-train you are testing.
     label_idx = template['args'].index('--odin:label') + 1
-    template['args'][label_idx] = re.sub(r"{{eval-task}}", eval_task, template['args'][label_idx])
+    template['args'][label_idx] = template['args'][label_idx].replace("{{eval-task}}", eval_task)
 
     # The dataset is the new evaluation dataset
     template['args'][template['args'].index('--dataset') + 1] = eval_dataset
@@ -310,7 +359,8 @@ def generate_eval_task(  # pylint: disable=too-many-locals
     template['args'][template['args'].index('--backend') + 1] = config['backend']
 
     # Pull reader type from the config and set that in the args
-    reader_params = config.get('reader', config.get('loader'))
+    # Only the reader and trainer sections are popped from so copy just those rather than the whole config
+    reader_params = dict(config['reader'] if 'reader' in config else config['loader'])
     reader_type = reader_params.pop('type') if 'type' in reader_params else reader_params.pop('reader_type')
     template['args'][template['args'].index('--reader') + 1] = reader_type
     # Extract features from the config and convert to the cli format
@@ -332,13 +382,14 @@ def generate_eval_task(  # pylint: disable=too-many-locals
         template['args'].extend(chain([f"--reader:{flag}"], map(str, listify(value))))
 
     # Extract trainer type
-    trainer = config['train'].pop("type", config['train'].pop("trainer_type", "default"))
+    train_params = dict(config['train'])
+    trainer = train_params.pop("type", train_params.pop("trainer_type", "default"))
     # Extract verbose options
-    verbose_options = config['train'].pop('verbose', {})
+    verbose_options = train_params.pop('verbose', {})
 
     # Set the rest of the trainer options as cli args
     template['args'].extend(['--trainer', trainer])
-    for flag, value in config['train'].items():
+    for flag, value in train_params.items():
         template['args'].extend(chain([f"--trainer:{flag}"], map(str, listify(value))))
 
     # If verbose is a bool (like in tagger config) convert to dict
@@ -391,7 +442,7 @@ def generate_export_task(  # pylint: disable=too-many-locals
     if not export_policy:
         return {}
     depends = listify(depends)
-    template = deepcopy(template)
+    template = _clone_template(template)
     template['image'] = odin_image
     template['mounts'][0]['claim'] = claim
     template['pull_policy'] = pull_policy
@@ -406,7 +457,7 @@ def generate_export_task(  # pylint: disable=too-many-locals
     template['args'][template['args'].index('--type') + 1] = export_policy
     template['args'][template['args'].index('--metric') + 1] = metric
 
-    template['depends'] = deepcopy(listify(depends))
+    template['depends'] = list(listify(depends))
     return template
 
 
@@ -556,12 +607,12 @@ def generate_pipeline(  # pylint: disable=too-many-locals,too-many-branches,too-
     template_loc = os.path.join(root_path, 'templates')
     images, claims = get_images(template_loc, mead_image, odin_image, claim_name)
 
-    templating_template = read_config_file(os.path.join(template_loc, 'templating-template.yml'))
-    mead_template = read_config_file(os.path.join(template_loc, 'mead-task-template.yml'))
-    mead_eval_template = read_config_file(os.path.join(template_loc, 'mead-eval-template.yml'))
-    export_template = read_config_file(os.path.join(template_loc, 'export-template.yml'))
-    hpctl_template = read_config_file(os.path.join(template_loc, 'hpctl-template.yml'))
-    chore_template = read_config_file(os.path.join(template_loc, 'chore-template.yml'))
+    templating_template = _load_template(template_loc, 'templating-template.yml')
+    mead_template = _load_template(template_loc, 'mead-task-template.yml')
+    mead_eval_template = _load_template(template_loc, 'mead-eval-template.yml')
+    export_template = _load_template(template_loc, 'export-template.yml')
+    hpctl_template = _load_template(template_loc, 'hpctl-template.yml')
+    chore_template = _load_template(template_loc, 'chore-template.yml')
 
     task = find_const_config_prop('task', configs.values())
     dataset = find_const_config_prop('dataset', configs.values())
@@ -683,7 +734,7 @@ def get_images(
     claim: Optional[str] = None,
 ) -> Tuple[Dict[str, str], Dict[str, str]]:
     """Get image names with a fallback to the images file."""
-    defaults = read_config_file(os.path.join(template_loc, 'images.yml'))
+    defaults = _load_template(template_loc, 'images.yml')
     mead = mead if mead is not None else defaults['mead-image']
     odin = odin if odin is not None else defaults['odin-image']
     claim = claim if claim is not None else defaults['claim-name']
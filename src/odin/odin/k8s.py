@@ -5,11 +5,12 @@ import os
 import re
 import json
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from copy import deepcopy
 from base64 import b64decode
 from itertools import chain
-from typing import Dict, List, Union, Optional, Any, AsyncIterator, Type, Tuple
+from typing import Dict, List, Union, Optional, Any, AsyncIterator, Set, Type, Tuple
 import asyncio
 from kubernetes import client, config
 import requests_async as arequests
@@ -211,6 +212,15 @@ class Task:
         )
 
 
+def _handle_name(handle: Handle) -> str:
+    """Get the name of a resource from a job id string or Job object
+
+    :param handle: job id string or Job object
+    :return: The name of the resource
+    """
+    return handle.name if isinstance(handle, Task) else handle
+
+
 class SubmitError(ValueError):
     """A custom error to raise when a Task can't be scheduled."""
 
@@ -242,6 +252,21 @@ class TaskManager:
         :param handle: job id string or Job object
         """
 
+    def kill_many(self, handles: List[Handle]) -> Set[str]:
+        """Kill several resources, ignoring the ones that can't be killed
+
+        :param handles: job id strings or Job objects
+        :return: The names of the resources that were killed
+        """
+        killed = set()
+        for handle in handles:
+            try:
+                self.kill(handle)
+                killed.add(_handle_name(handle))
+            except Exception:  # pylint: disable=broad-except
+                pass
+        return killed
+
     async def wait_for(self, task: Task) -> None:
         """Wait for something to complete (async)
 
@@ -643,6 +668,8 @@ class KubernetesTaskManager(TaskManager):
         except config.config_exception.ConfigException:
             config.load_kube_config()
         self.store = store
+        # The config was loaded above so keep a client around instead of reloading it on every call.
+        self.core_api = client.CoreV1Api()
 
         for module in modules:
             import_user_module(module)
@@ -715,7 +742,9 @@ class KubernetesTaskManager(TaskManager):
         yield b"".join(line).decode('utf-8')
 
     # Need to push this down into the resource handler
-    def get_logs(self, name: str, container: Optional[str] = None, lines: Optional[int] = None) -> str:
+    def get_logs(
+        self, name: str, container: Optional[str] = None, lines: Optional[int] = None, max_workers: int = 16
+    ) -> str:
         """Get a snapshot of the logs of a pod.
 
         Note:
@@ -726,14 +755,10 @@ class KubernetesTaskManager(TaskManager):
         :param container: The container to get logs from. Only needed when there
             are multiple pods in a single container.
         :param lines: Only grab the last {lines} entries from the log
+        :param max_workers: The maximum number of pods to read logs from at the same time
         :returns: The logs in a single string.
         """
-        try:
-            config.load_incluster_config()
-        except config.config_exception.ConfigException:
-            config.load_kube_config()
         prefix = ""
-        api = client.CoreV1Api()
 
         pods = self.find_resource_names(name)
         if len(pods) > 1:
@@ -751,10 +776,14 @@ class KubernetesTaskManager(TaskManager):
             # Here the parameter is in snake_case because we are interacting with k8s through the python client.
             args['tail_lines'] = lines
 
+        def read_log(pod: str) -> str:
+            logs = self.core_api.read_namespaced_pod_log(pod, namespace=self.namespace, **args)
+            return f"{'=' * 16}\n{pod}\n{'-' * 16}\n{logs}"
+
         all_logs = [prefix] if prefix else []
-        for pod in pods:
-            logs = api.read_namespaced_pod_log(pod, namespace=self.namespace, **args)
-            all_logs.append(f"{'=' * 16}\n{pod}\n{'-' * 16}\n{logs}")
+        # Multi-worker jobs have a pod per worker, fetch their logs in parallel.
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pods))) as executor:
+            all_logs.extend(executor.map(read_log, pods))
         return '\n'.join(all_logs)
 
     def _find_resources(self, task: str) -> List[Tuple[str, str]]:
@@ -874,8 +903,22 @@ class KubernetesTaskManager(TaskManager):
         :param handle: A string id or Job
         """
         resource_type = self.get_resource_type(handle)
-        name = handle.name if isinstance(handle, Task) else handle
-        self.handler_for(resource_type).kill(name, self.store)
+        self.handler_for(resource_type).kill(_handle_name(handle), self.store)
+
+    def kill_many(self, handles: List[Handle], max_workers: int = 16) -> Set[str]:
+        """Kill several resources at once
+
+        Each kill is a round trip to the API server so they are sent in parallel.
+
+        :param handles: job id strings or Job objects
+        :param max_workers: The maximum number of kill requests in flight
+        :return: The names of the resources that were killed
+        """
+        if not handles:
+            return set()
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(handles))) as executor:
+            futures = {executor.submit(self.kill, handle): _handle_name(handle) for handle in handles}
+        return {name for future, name in futures.items() if future.exception() is None}
 
     async def wait_for(self, task: Task) -> Task:
         """Wait for pod to complete, as defined by any of these phases
@@ -955,11 +998,6 @@ class KubernetesTaskManager(TaskManager):
 
         :returns: The event information.
         """
-        try:
-            config.load_incluster_config()
-        except config.config_exception.ConfigException:
-            config.load_kube_config()
-
         all_events = []
         resources = self._find_resources(name)
         for (resource_type, name) in resources:
@@ -142,6 +142,16 @@ class MongoStore(Store):
         """
         self.db[MongoStore.JOBS].replace_one({Store.PIPE_ID: value[Store.PIPE_ID]}, value, upsert=True)
 
+    def _set_many(self, values: List[Dict]) -> None:
+        """This updates the job store for several entries in a single round trip
+
+        :param values: The objects to store, one per job
+        """
+        if not values:
+            return
+        requests = [pymongo.ReplaceOne({Store.PIPE_ID: value[Store.PIPE_ID]}, value, upsert=True) for value in values]
+        self.db[MongoStore.JOBS].bulk_write(requests, ordered=True)
+
     def exists(self, job_id: str) -> bool:
         """Check if there is a job in the database with this id
 
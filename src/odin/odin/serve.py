@@ -7,7 +7,7 @@ import argparse
 import asyncio
 import traceback
 from datetime import datetime, date
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncGenerator, AsyncIterator, Optional
 from functools import partial
 import websockets
 import git
@@ -23,6 +23,20 @@ from odin.status import get_status
 from odin.store import create_store_backend, create_cache_backend
 from odin.k8s import KubernetesTaskManager, KF_MODULES, ELASTIC_MODULES, CORE_MODULES
 
+try:
+    from contextlib import aclosing
+except ImportError:  # Added in python 3.10
+    from contextlib import asynccontextmanager
+
+    @asynccontextmanager
+    async def aclosing(thing):
+        """Close an async generator when the block is left, like `contextlib.closing`."""
+        try:
+            yield thing
+        finally:
+            await thing.aclose()
+
+
 LOGGER = logging.getLogger('odin')
 
 STORE = None
@@ -60,6 +74,50 @@ def seralize(obj: Any) -> str:
     raise TypeError(f"Type {type(obj)} not JSON serializable")
 
 
+async def batch_lines(lines: AsyncGenerator[str, None], max_lines: int = 64) -> AsyncIterator[str]:
+    """Group log lines that are already waiting into a single `\n` separated message.
+
+    Lines are read from `lines` in the background so a message never waits for a line
+    that hasn't arrived yet, it just carries every line that showed up since the last one.
+
+    :param lines: The lines to group, closed when this generator is
+    :param max_lines: The most lines to put in a single message
+    :returns: An async generator of `\n` joined lines
+    """
+    queue = asyncio.Queue(maxsize=16 * max_lines)
+
+    async def produce():
+        try:
+            async for line in lines:
+                await queue.put(line)
+        except Exception as exc:
+            # Wake the consumer so it sees the error. On python 3.7 (our images) a cancellation is an
+            # `Exception` and lands here too, then the consumer is gone and the queue could be full
+            if not isinstance(exc, asyncio.CancelledError):
+                await queue.put(None)
+            raise
+        await queue.put(None)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        finished = False
+        while not finished:
+            batch = [await queue.get()]
+            while len(batch) < max_lines and not queue.empty():
+                batch.append(queue.get_nowait())
+            if batch[-1] is None:
+                batch.pop()
+                finished = True
+            if batch:
+                yield '\n'.join(batch)
+        # Surface any error that stopped the lines early
+        await producer
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+        await lines.aclose()
+
+
 async def send_with_extra(websocket: 'Websocket', extras: Dict, data: Dict) -> None:
     """Send data with extras added encoded as a json string over websocket.
 
@@ -158,11 +216,13 @@ async def handle_request(websocket, _) -> None:  # pylint: disable=too-many-bran
             work.pop('namespace')
             work['name'] = name
             if work.pop('follow', False):
-                async for log in task_mgr.follow_logs(name):
-                    try:
-                        await send({APIField.STATUS: APIStatus.OK, APIField.RESPONSE: log})
-                    except websockets.exceptions.ConnectionClosed:
-                        return
+                # Busy pods can write thousands of lines a second so send them in batches
+                async with aclosing(batch_lines(task_mgr.follow_logs(name))) as logs:
+                    async for log in logs:
+                        try:
+                            await send({APIField.STATUS: APIStatus.OK, APIField.RESPONSE: log})
+                        except websockets.exceptions.ConnectionClosed:
+                            return
             else:
                 await send({APIField.STATUS: APIStatus.OK, APIField.RESPONSE: task_mgr.get_logs(**work)})
             await send({APIField.STATUS: APIStatus.END, APIField.RESPONSE: 'LOGS'})
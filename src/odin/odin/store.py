@@ -62,6 +62,24 @@ class Store:
         :return:
         """
 
+    def set_many(self, values: List[Dict]) -> None:
+        """This updates the job store for several entries at once
+
+        Each Dict must include a `label` key
+        :param values: The objects to store, one per job
+        """
+        for value in values:
+            self._set_preconditions(value)
+        self._set_many(values)
+
+    def _set_many(self, values: List[Dict]) -> None:
+        """Actual setter function for several entries, backends that can write in bulk should override this
+
+        :param values: The objects to store, one per job
+        """
+        for value in values:
+            self._set(value)
+
     def exists(self, job_id: str) -> bool:
         """Check if there is a job in the database with this id
 
@@ -92,10 +110,10 @@ class Store:
 
     def _set_preconditions(self, value: Dict):
         if value is None:
-            raise Exception("You may not set an empty value")
+            raise ValueError("You may not set an empty value")
 
         if Store.PIPE_ID not in value:
-            raise Exception(f"There must a be {Store.PIPE_ID} field in the dictionary to persist it")
+            raise ValueError(f"There must a be {Store.PIPE_ID} field in the dictionary to persist it")
 
     def parents_like(self, pattern: str) -> List[str]:
         """Get all the parent jobs that match some pattern
@@ -1,23 +1,43 @@
 """Tools to hash files."""
 
 import os
+import mmap
+import time
 from pathlib import Path
-from hashlib import sha1
 from itertools import chain
+from concurrent.futures import Future
 from functools import partial
-from typing import List, Union, BinaryIO, Any, Optional
+from typing import Dict, List, Union, BinaryIO, Any, Optional
 from baseline.utils import str_file, listify
 from odin import LOGGER
+from odin.store import Cache
 
 
+# blake3 is much faster on large artifacts but it is optional, sha256 is the fallback.
+try:
+    from blake3 import blake3 as new_hasher
+
+    HASH_NAME = 'blake3'
+except ImportError:
+    from hashlib import sha256 as new_hasher
+
+    HASH_NAME = 'sha256'
+
 # There is no hashlib base class so create something for typing.
 Hash = Any  # pylint: disable=invalid-name
 
+HASH_BLOCK_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 10 * 1024 * 1024
+RACY_SECONDS = 2
+
 
 @str_file(f='rb')
-def hash_file(f: Union[str, BinaryIO], hasher: Hash, block_size: int = 1024) -> Hash:
+def hash_file(f: Union[str, BinaryIO], hasher: Hash, block_size: int = HASH_BLOCK_SIZE) -> Hash:
     """Update a hash function with the contents for a file.
 
+    The blocks are read into one reused buffer so large files don't allocate a new
+    bytes object per block.
+
     :param f: The file to hash.
     :param hasher: The hash object to use.
     :param block_size: The size of chunks used to read the file in. This
@@ -25,26 +45,114 @@ def hash_file(f: Union[str, BinaryIO], hasher: Hash, block_size: int = 1024) ->
 
     :returns: The hash object updated with the file contents.
     """
-    for block in iter(partial(f.read, block_size), b''):
-        hasher.update(block)
+    if _mmap_size(f) >= MMAP_THRESHOLD:
+        # Let the hasher read large files straight out of the page cache
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            hasher.update(mapped)
+        return hasher
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    for size in iter(partial(f.readinto, buffer), 0):
+        hasher.update(view[:size])
     return hasher
 
 
-def hash_files(files: Union[str, List[str]], hasher: Optional[Hash] = None, block_size: int = 1024) -> str:
+def _mmap_size(f: BinaryIO) -> int:
+    """Get the size of a file that can be memory mapped from the start.
+
+    :param f: The open file.
+    :returns: The size of the file, or 0 if it is not a real file or has already been read from.
+    """
+    try:
+        if f.tell() != 0:
+            return 0
+        return os.fstat(f.fileno()).st_size
+    except (OSError, ValueError):
+        return 0
+
+
+def hash_files(
+    files: Union[str, List[str]],
+    hasher: Optional[Hash] = None,
+    block_size: int = HASH_BLOCK_SIZE,
+    cache: Optional[Cache] = None,
+    file_hashes: Optional[Dict[str, Future]] = None,
+) -> str:
     """Hash a list of files.
 
+    Each file is hashed on its own and the combined hash is made from those digests, this
+    lets the digest of an unchanged file be reused from `cache` instead of reading it again.
+
     :param files: The list of files to hash.
-    :param hasher: The hash object. defaults to sha1.
+    :param hasher: The hash object used to combine the file hashes. defaults to blake3 when it
+        is installed, otherwise sha256.
     :param block_size: The size of chunks used to read the files in.
+    :param cache: A cache to save file hashes in, keyed by the path, size and modification time.
+    :param file_hashes: The file hashes made, or being made, by other calls that run at the same time.
+        A file shared between these calls is only read once.
 
     :returns: The hexdigest of all the files.
     """
-    hasher = hasher if hasher is not None else sha1()
+    hasher = hasher if hasher is not None else new_hasher()
     for f in sorted(expand_dirs(listify(files))):
-        hasher = hash_file(f, hasher, block_size)
+        hasher.update(_hash_one_file(f, block_size, cache, file_hashes).encode('utf-8'))
     return hasher.hexdigest()
 
 
+def _hash_one_file(
+    file_name: str, block_size: int, cache: Optional[Cache] = None, file_hashes: Optional[Dict[str, Future]] = None
+) -> str:
+    """Hash a single file, reusing the hash from the cache if the file hasn't changed since.
+
+    :param file_name: The file to hash.
+    :param block_size: The size of chunks used to read the file in.
+    :param cache: A cache to save file hashes in.
+    :param file_hashes: The file hashes shared with other calls running at the same time.
+    :returns: The hexdigest of the file.
+    """
+    if cache is None and file_hashes is None:
+        return hash_file(file_name, new_hasher(), block_size).hexdigest()
+    stat = os.stat(file_name)
+    key = f"file:{HASH_NAME}:{os.path.abspath(file_name)}:{stat.st_size}:{stat.st_mtime_ns}"
+    if file_hashes is None:
+        return _hash_settled_file(file_name, block_size, cache, key, stat.st_mtime)
+    # setdefault is atomic so only the first caller hashes the file, the rest wait for its result
+    future = Future()
+    shared = file_hashes.setdefault(key, future)
+    if shared is not future:
+        return shared.result()
+    try:
+        digest = _hash_settled_file(file_name, block_size, cache, key, stat.st_mtime)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    future.set_result(digest)
+    return digest
+
+
+def _hash_settled_file(file_name: str, block_size: int, cache: Optional[Cache], key: str, mtime: float) -> str:
+    """Hash a file through the cache, only saving the hash if the file hasn't been written to recently.
+
+    :param file_name: The file to hash.
+    :param block_size: The size of chunks used to read the file in.
+    :param cache: A cache to save file hashes in.
+    :param key: The cache key of the file.
+    :param mtime: The modification time of the file.
+    :returns: The hexdigest of the file.
+    """
+    if cache is None:
+        return hash_file(file_name, new_hasher(), block_size).hexdigest()
+    digest = cache[key]
+    if digest is not None:
+        return digest
+    digest = hash_file(file_name, new_hasher(), block_size).hexdigest()
+    # A file written in the last few seconds could be written again without changing its
+    # modification time on coarse grained filesystems, so only trust settled files.
+    if time.time() - mtime > RACY_SECONDS:
+        cache[key] = digest
+    return digest
+
+
 def expand_dirs(files: List[str]) -> List[str]:
     """Given a list of files and dirs return a list all files in the dir.
 
@@ -82,4 +190,25 @@ def hash_args(command: Union[str, List[str]], args: List[str]) -> str:
     :param args: The arguments the container receives.
     :returns: The hash of the container args.
     """
-    return sha1("".join(chain(listify(command), args)).encode('utf-8')).hexdigest()
+    return hash_str("".join(chain(listify(command), args)))
+
+
+def hash_str(data: str) -> str:
+    """Hash a string.
+
+    :param data: The string to hash.
+    :returns: The hexdigest of the string.
+    """
+    return new_hasher(data.encode('utf-8')).hexdigest()
+
+
+def cache_key(digest: str) -> str:
+    """Tag a digest with the hash function that made it.
+
+    Digests from different hash functions never match so tagging them keeps entries from
+    an older hash function, or a machine without blake3, apart in a shared cache.
+
+    :param digest: The hexdigest to tag.
+    :returns: The tagged digest.
+    """
+    return f"{HASH_NAME}:{digest}"
@@ -6,11 +6,8 @@ from odin import LOGGER
 from jinja2 import Template
 from eight_mile.downloads import open_file_or_url
 from mead.utils import parse_and_merge_overrides
-from shortid import ShortId
 import os.path
 
-SHORT_ID = ShortId()
-
 SUFFIX = '.yml.jinja2'
 
 
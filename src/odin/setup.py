@@ -28,13 +28,11 @@ setup(
         'pyyaml>=5.1',
         'websockets',
         'kubernetes',
-        'shortid',
         'GitPython',
         'pymongo <= 3.12.0',
         'SQLAlchemy',
         'psycopg2-binary',
         'ruamel.yaml',
-        'cachetools',
         'prompt_toolkit >= 2.0.0',
         'requests-async',
         'requests',
@@ -42,7 +40,7 @@ setup(
         'mead-baseline >= 2.0.1',
         'mead-xpctl-client',
     ],
-    extras_require={'test': ['pytest']},
+    extras_require={'test': ['pytest'], 'blake3': ['blake3']},
     entry_points={
         'console_scripts': [
             'odin-chores = odin.chores:main',
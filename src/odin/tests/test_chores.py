@@ -1,7 +1,19 @@
+import os
+import git
 import yaml
+import pytest
 from getpass import getuser
 
-from odin.chores import register_chore, run_chores
+from odin.chores import (
+    register_chore,
+    run_chores,
+    copy,
+    bump_version,
+    set_repo_creds,
+    _repo_version_match,
+    _open_repo,
+    ChoreSkippedException,
+)
 from odin.version import __version__
 
 
@@ -70,3 +82,148 @@ def test_external():
     results = run_chores(
         yaml.load(YAML_CONFIG2, Loader=yaml.FullLoader), {"something": {"version": __version__, "username": user}}
     )
+
+
+@register_chore('give-up')
+def give_up():
+    raise ChoreSkippedException()
+
+
+YAML_CONFIG3 = """
+chores:
+- name: quit
+  type: give-up
+- name: after-quit
+  type: say-hello
+  user: ^quit
+- name: user
+  type: get-username
+- name: hi
+  type: say-hello
+  user: ^user
+"""
+
+
+def test_skipped_chores():
+    results = run_chores(yaml.load(YAML_CONFIG3, Loader=yaml.FullLoader), {})
+    assert results['quit'] is None
+    assert 'after-quit' not in results
+    assert results['hi'] == 'Hello, {}'.format(getuser())
+
+
+def _commit(repo, dir_, name):
+    with open(os.path.join(dir_, name), 'w') as wf:
+        wf.write(name)
+    repo.index.add([name])
+    repo.index.commit(name)
+
+
+def test_repo_version_match(tmp_path):
+    origin_dir = str(tmp_path / 'origin')
+    origin = git.Repo.init(origin_dir)
+    _commit(origin, origin_dir, 'first')
+    origin.git.branch('-M', 'master')
+    clone = git.Repo.clone_from(origin_dir, str(tmp_path / 'clone'))
+    assert _repo_version_match(clone)
+    _commit(origin, origin_dir, 'second')
+    clone.remotes.origin.fetch()
+    assert not _repo_version_match(clone)
+
+
+def test_bump_version(tmp_path):
+    file_name = str(tmp_path / 'deployment.yml')
+    with open(file_name, 'w') as wf:
+        wf.write("kind: Deployment  # keep me\nmetadata:\n  labels:\n    version: '3'\n")
+    bump_version(file_name)
+    bump_version(file_name)
+    with open(file_name) as rf:
+        content = rf.read()
+    assert "# keep me" in content
+    assert yaml.safe_load(content)['metadata']['labels']['version'] == '5'
+
+
+def test_copy(tmp_path):
+    src = tmp_path / 'src'
+    (src / 'sub').mkdir(parents=True)
+    (src / 'sub' / 'a.txt').write_bytes(b'a' * 100000)
+    dst = tmp_path / 'dst'
+    dst.mkdir()
+    assert copy(str(src / 'sub' / 'a.txt'), str(dst)) == str(dst / 'a.txt')
+    assert (dst / 'a.txt').read_bytes() == b'a' * 100000
+    assert copy(str(src), str(dst)) == str(dst / 'src')
+    assert (dst / 'src' / 'sub' / 'a.txt').read_bytes() == b'a' * 100000
+
+
+@register_chore('count-calls')
+def count_calls(calls: list) -> int:
+    calls.append(1)
+    return len(calls)
+
+
+def test_unknown_chore_runs_nothing():
+    calls = []
+    config = {'chores': [{'name': 'count', 'type': 'count-calls', 'calls': calls}, {'name': 'bad', 'type': 'missing'}]}
+    with pytest.raises(KeyError):
+        run_chores(config, {})
+    assert calls == []
+
+
+def test_set_repo_creds(tmp_path):
+    repo = git.Repo.init(str(tmp_path))
+    set_repo_creds(repo, name='odin', email='odin@example.com')
+    with repo.config_reader() as reader:
+        assert reader.get_value('user', 'name') == 'odin'
+        assert reader.get_value('user', 'email') == 'odin@example.com'
+
+
+OPENED_REPOS = []
+
+
+@register_chore('open-repo')
+def open_repo(path):
+    with _open_repo(path) as repo:
+        OPENED_REPOS.append(repo)
+    return True
+
+
+def test_repos_are_shared_within_a_run_only(tmp_path):
+    git.Repo.init(str(tmp_path)).close()
+
+    def config():
+        return {
+            'chores': [
+                {'name': 'first', 'type': 'open-repo', 'path': str(tmp_path)},
+                {'name': 'second', 'type': 'open-repo', 'path': str(tmp_path), 'depends': 'first'},
+            ]
+        }
+
+    OPENED_REPOS.clear()
+    run_chores(config(), {})
+    run_chores(config(), {})
+    first, second, third, fourth = OPENED_REPOS
+    assert first is second
+    assert third is fourth
+    assert first is not third
+
+
+RAN_CHORES = []
+
+
+@register_chore('record-run')
+def record_run(label):
+    RAN_CHORES.append(label)
+    return label
+
+
+def test_cycle_runs_nothing():
+    config = {
+        'chores': [
+            {'name': 'free', 'type': 'record-run', 'label': 'free'},
+            {'name': 'a', 'type': 'say-hello', 'user': 'a', 'depends': 'b'},
+            {'name': 'b', 'type': 'say-hello', 'user': 'b', 'depends': 'a'},
+        ]
+    }
+    RAN_CHORES.clear()
+    with pytest.raises(ValueError):
+        run_chores(config, {})
+    assert RAN_CHORES == []
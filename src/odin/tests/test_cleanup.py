@@ -0,0 +1,33 @@
+from odin.cleanup import cleanup, Cleaned
+from odin.k8s import TaskManager, Handle
+from odin.store import Store, MemoryStore
+
+
+class MockTaskManager(TaskManager):
+    def kill(self, handle: Handle) -> None:
+        if handle == 'job--b':
+            raise Exception("Cant kill")
+
+
+def test_cleanup():
+    store = MemoryStore()
+    store.set({Store.PIPE_ID: 'job', Store.EXECUTED: ['job--a', 'job--b'], Store.EXECUTING: ['job--c']})
+    for child in ('job--a', 'job--b', 'job--c'):
+        store.set({Store.PIPE_ID: child})
+    cleaned = cleanup('job', store, MockTaskManager(), purge_db=True)
+    assert cleaned == [
+        Cleaned('job', 'No', 'Yes', 'No'),
+        Cleaned('job--a', 'Yes', 'Yes', 'No'),
+        Cleaned('job--b', 'No', 'Yes', 'No'),
+        Cleaned('job--c', 'Yes', 'Yes', 'No'),
+    ]
+    assert store.db == {}
+
+
+def test_cleanup_purge_fs(tmp_path):
+    store = MemoryStore()
+    store.set({Store.PIPE_ID: 'job', Store.EXECUTED: ['job--a'], Store.EXECUTING: []})
+    (tmp_path / 'job' / 'job--a').mkdir(parents=True)
+    cleaned = cleanup('job', store, MockTaskManager(), purge_fs=True, data_dir=str(tmp_path))
+    assert cleaned == [Cleaned('job', 'No', 'No', 'Yes'), Cleaned('job--a', 'Yes', 'No', 'Yes')]
+    assert not (tmp_path / 'job').exists()
@@ -5,7 +5,7 @@ import random
 import string
 from typing import Optional
 import pytest
-from odin.core import wire_inputs
+from odin.core import wire_inputs, parse_reference
 
 CHARS = list(chain(string.ascii_letters, string.digits))
 if '^' in CHARS:
@@ -108,3 +108,9 @@ class RecordingDict(dict):
         self.requested[key] += 1
         default = self.sub if isinstance(default, dict) else default
         return super().get(key, default)
+
+
+def test_parse_reference():
+    assert parse_reference('^first.0.name') == ['first', '0', 'name']
+    assert parse_reference('first.name') == ['first', 'name']
+    assert parse_reference('^first') == ['first']
@@ -9,10 +9,11 @@ from odin.dag import (
     Node,
     rev_graph,
     topo_sort,
-    topo_sort_kahn,
     topo_sort_parallel,
     find_children,
-    _find_children,
+    CycleError,
+    dot_graph,
+    write_graph,
 )
 
 
@@ -114,6 +115,35 @@ def test_topo_sort_with_empty():
         assert is_valid(s, rev_graph(f))
 
 
+def test_topo_parallel_levels():
+    graph = defaultdict(set, {0: {1, 2}, 1: {3}, 2: {3}, 4: set()})
+    assert topo_sort_parallel(graph) == [{0, 4}, {1, 2}, {3}]
+
+
+def test_topo_parallel_cycle():
+    graph = defaultdict(set, {0: {1}, 1: {2}, 2: {1}})
+    with pytest.raises(CycleError):
+        topo_sort_parallel(graph)
+
+
+def test_topo_cycle():
+    graph = defaultdict(set, {0: {1}, 1: {2}, 2: {1}})
+    with pytest.raises(ValueError):
+        topo_sort(graph)
+
+
+def test_dot_graph():
+    graph = defaultdict(set, {'a-b': {'c-d'}, 'c-d': set()})
+    assert dot_graph(graph) == "digraph {\n  a_b -> c_d;\n  c_d;\n}"
+
+
+def test_write_graph(tmp_path):
+    graph = defaultdict(set, {'a-b': {'c-d'}, 'c-d': set()})
+    file_name = tmp_path / 'graph.dot'
+    write_graph(graph, str(file_name))
+    assert file_name.read_text() == dot_graph(graph) + "\n"
+
+
 def test_descendents_are_subsets():
     for _ in range(10):
         graph = generate_dag(100)
@@ -123,14 +153,35 @@ def test_descendents_are_subsets():
                 assert descendents[child].issubset(descendents[node])
 
 
+def reachable(graph: Graph, root: Node) -> set:
+    """Find the children of a node by walking the graph from it."""
+    seen = set()
+    stack = list(graph.get(root, ()))
+    while stack:
+        node = stack.pop()
+        if node not in seen:
+            seen.add(node)
+            stack.extend(graph.get(node, ()))
+    return seen
+
+
+def test_find_children_matches_single_root():
+    for _ in range(10):
+        graph = generate_dag(50)
+        descendents = find_children(graph)
+        for node in graph:
+            assert descendents[node] == reachable(graph, node)
+
+
 def test_find_descendents():
     graph = defaultdict(set, {0: {1, 2}, 1: {4}, 3: {5}})
     gold_zero = {1, 2, 4}
-    zero = _find_children(graph, 0)
+    descendents = find_children(graph)
+    zero = descendents[0]
     assert zero == gold_zero
 
     gold_three = {5}
-    three = _find_children(graph, 3)
+    three = descendents[3]
     assert three == gold_three
 
 
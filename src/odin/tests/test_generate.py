@@ -115,6 +115,21 @@ def test_get_images_location():
         read_patch.assert_called_once_with(f"{loc}/images.yml")
 
 
+def test_get_images_reads_once():
+    loc = rand_str(12)
+    defaults = {
+        'mead-image': rand_str(),
+        'odin-image': rand_str(),
+        'template-image': rand_str(),
+        'hpctl-image': rand_str(),
+        'claim-name': rand_str(),
+    }
+    with patch('odin.generate.read_config_file') as read_patch:
+        read_patch.return_value = defaults
+        assert get_images(loc) == get_images(loc)
+        read_patch.assert_called_once_with(f"{loc}/images.yml")
+
+
 @pytest.fixture
 def depends_data():
     depends_len = random.randint(0, 2)
@@ -289,3 +304,27 @@ def test_genereate_chore_task_values(depends_data):
 def test_generate_export_no_export():
     mead_export = generate_export_task({}, None, None, None, None, None, None, None, export_policy=None)
     assert mead_export == {}
+
+
+def test_generate_export_leaves_template():
+    template = {
+        'image': None,
+        'mounts': [{'name': 'data', 'claim': None}],
+        'args': ['--models', None, '--task', None, '--type', None, '--metric', None],
+    }
+    gold = deepcopy(template)
+    export = generate_export_task(template, 'odin', 'claim', ['a', 'b'], 'classify', 'sst2', ['a', 'b'], 'f1', 'best')
+    assert template == gold
+    assert export['mounts'] == [{'name': 'data', 'claim': 'claim'}]
+    models = ['${PIPE_ID}--b', '${PIPE_ID}--a']
+    assert export['args'] == ['--models', *models, '--task', 'classify', '--type', 'best', '--metric', 'f1']
+
+
+def test_templates_are_reread_after_they_change(tmp_path):
+    images = tmp_path / 'images.yml'
+    images.write_text("mead-image: a\nodin-image: o\ntemplate-image: t\nhpctl-image: h\nclaim-name: c\n")
+    assert get_images(str(tmp_path))[0]['mead'] == 'a'
+    images.write_text("mead-image: b\nodin-image: o\ntemplate-image: t\nhpctl-image: h\nclaim-name: c\n")
+    stat = images.stat()
+    os.utime(images, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert get_images(str(tmp_path))[0]['mead'] == 'b'
@@ -0,0 +1,107 @@
+import asyncio
+import os
+from odin.utils import hash as odin_hash
+from odin.executor import hash_inputs, hash_outputs
+from odin.k8s import Task
+from odin.store import MemoryCache
+from odin.utils.hash import hash_files, new_hasher, HASH_NAME
+
+
+def combined(*contents):
+    hasher = new_hasher()
+    for content in contents:
+        hasher.update(new_hasher(content).hexdigest().encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def test_hash_files_matches_contents(tmp_path):
+    a = os.urandom(5000)
+    b = os.urandom(123)
+    (tmp_path / 'b').write_bytes(b)
+    (tmp_path / 'a').write_bytes(a)
+    gold = combined(a, b)
+    assert hash_files([str(tmp_path)]) == gold
+    assert hash_files([str(tmp_path / 'b'), str(tmp_path / 'a')], block_size=64) == gold
+
+
+def test_hash_files_empty(tmp_path):
+    (tmp_path / 'a').write_bytes(b'')
+    assert hash_files(str(tmp_path / 'a')) == combined(b'')
+
+
+def test_hash_files_mmap(tmp_path, monkeypatch):
+    a = os.urandom(5000)
+    b = os.urandom(123)
+    (tmp_path / 'a').write_bytes(a)
+    (tmp_path / 'b').write_bytes(b)
+    monkeypatch.setattr(odin_hash, 'MMAP_THRESHOLD', 1000)
+    assert hash_files([str(tmp_path)]) == combined(a, b)
+
+
+def test_hash_outputs_per_key(tmp_path):
+    (tmp_path / 'a').write_bytes(b'a')
+    (tmp_path / 'b').write_bytes(b'b')
+    outputs = {'b': [str(tmp_path / 'b')], 'a': str(tmp_path / 'a')}
+    gold = new_hasher(f"a\0{combined(b'a')}\0b\0{combined(b'b')}\0".encode('utf-8')).hexdigest()
+    assert hash_outputs(outputs) == f'{HASH_NAME}:{gold}'
+
+
+def test_hash_files_reuses_settled_files(tmp_path, monkeypatch):
+    path = tmp_path / 'a'
+    path.write_bytes(b'a')
+    old = path.stat().st_mtime - 60
+    os.utime(path, (old, old))
+    cache = MemoryCache()
+    assert hash_files(str(path), cache=cache) == combined(b'a')
+    assert len(cache.keys()) == 1
+    # A cached hash is used as long as the size and modification time match
+    monkeypatch.setattr(odin_hash, 'hash_file', None)
+    assert hash_files(str(path), cache=cache) == combined(b'a')
+
+
+def test_hash_files_skips_recent_files(tmp_path):
+    path = tmp_path / 'a'
+    path.write_bytes(b'a')
+    cache = MemoryCache()
+    assert hash_files(str(path), cache=cache) == combined(b'a')
+    assert not cache.keys()
+
+
+def test_hash_files_shares_file_hashes(tmp_path, monkeypatch):
+    (tmp_path / 'a').write_bytes(b'a')
+    (tmp_path / 'b').write_bytes(b'b')
+    read = []
+    hash_file = odin_hash.hash_file
+
+    def counting_hash_file(f, *args, **kwargs):
+        read.append(f)
+        return hash_file(f, *args, **kwargs)
+
+    monkeypatch.setattr(odin_hash, 'hash_file', counting_hash_file)
+    file_hashes = {}
+    assert hash_files(str(tmp_path / 'a'), file_hashes=file_hashes) == combined(b'a')
+    assert hash_files(str(tmp_path), file_hashes=file_hashes) == combined(b'a', b'b')
+    assert sorted(read) == [str(tmp_path / 'a'), str(tmp_path / 'b')]
+
+
+class CountingHasher:
+    def __init__(self):
+        self.calls = 0
+
+    async def hash_task(self, task):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return [task.image]
+
+
+def test_hash_inputs_shares_container_lookups():
+    sched = CountingHasher()
+    container_hashes = {}
+    tasks = [Task(name, image, 'cmd', []) for name, image in (('a', 'x'), ('b', 'x'), ('c', 'y'))]
+
+    async def run():
+        return await asyncio.gather(*(hash_inputs(task, sched, container_hashes) for task in tasks))
+
+    hashes = asyncio.get_event_loop().run_until_complete(run())
+    assert sched.calls == 2
+    assert hashes[0] == hashes[1] != hashes[2]
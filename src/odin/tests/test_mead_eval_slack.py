@@ -0,0 +1,50 @@
+import csv
+from odin.addons import mead_eval_slack
+from odin.addons.mead_eval_slack import _read_mismatches, slack_webhook_mead_eval_intent
+
+
+class FakeSession:
+    def __init__(self):
+        self.posts = []
+
+    def post(self, url, json, timeout):
+        self.posts.append(json['text'])
+
+
+def run_report(tmp_path, monkeypatch, files):
+    for job_id, contents in files.items():
+        (tmp_path / f'{job_id}.tsv').write_text(contents)
+    session = FakeSession()
+    monkeypatch.setattr(mead_eval_slack, 'HTTP_SESSION', session)
+    executed = ['train', *files]
+    slack_webhook_mead_eval_intent({'executed': executed}, 'hook', 'report', str(tmp_path))
+    with open(tmp_path / 'results.csv', newline='') as rf:
+        return session.posts[0], list(csv.reader(rf))
+
+
+def test_read_mismatches_pads_short_rows(tmp_path):
+    file_name = tmp_path / 'eval.tsv'
+    file_name.write_text("a\tx\tx\n\nb\ty\nc\tz\tw\nd\n")
+    mismatches, width = _read_mismatches(str(file_name))
+    # The blank line isn't counted, a missing prediction is a failure and a lone column is not
+    assert mismatches == [(1, ['b', 'y', '']), (2, ['c', 'z', 'w'])]
+    assert width == 3
+
+
+def test_report_unions_columns_across_jobs(tmp_path, monkeypatch):
+    files = {'mead-eval-1': "a\tx\tx\n\nb\ty\nc\tz\tw\n", 'mead-eval-2': "e\tq\tr\textra\nf\tg\tg\n"}
+    message, rows = run_report(tmp_path, monkeypatch, files)
+    assert message == 'report\n[[job_id]] mead-eval-1 [[failures]]: 2\n[[job_id]] mead-eval-2 [[failures]]: 1'
+    assert rows == [
+        ['', 'job_id', '0', '1', '2', '3'],
+        ['1', 'mead-eval-1', 'b', 'y', '', ''],
+        ['2', 'mead-eval-1', 'c', 'z', 'w', ''],
+        ['0', 'mead-eval-2', 'e', 'q', 'r', 'extra'],
+    ]
+    assert not any((tmp_path / f'{job_id}.tsv').exists() for job_id in files)
+
+
+def test_report_without_mismatches(tmp_path, monkeypatch):
+    message, rows = run_report(tmp_path, monkeypatch, {'mead-eval-1': "a\tx\tx\nb\ty\ty\n"})
+    assert message == 'report\n[[job_id]] mead-eval-1 [[failures]]: 0'
+    assert rows == [['', 'job_id', '0', '1', '2']]
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import time
 import yaml
@@ -7,9 +8,9 @@ from unittest.mock import MagicMock
 
 from odin.core import create_graph, read_pipeline_config
 from odin.dag import topo_sort
-from odin.k8s import TaskManager, Task, Handle, StatusType
+from odin.k8s import TaskManager, Task, Handle, StatusType, SubmitError
 from odin.executor import Executor
-from odin.store import MemoryStore
+from odin.store import MemoryStore, Store
 
 YAML_CONFIG = """
 name: test-job
@@ -265,3 +266,180 @@ def test_pipeline1():
         loop.close()
 
 
+FailStatus = namedtuple('FailStatus', 'phase, status_type, message')
+
+
+def _task(name: str, args: str = '[]', **extra: str) -> str:
+    """Build the yaml for a task that runs python, `extra` adds more keys to it."""
+    stanza = f"- name: {name}\n  image: python\n  command: python3\n  args: {args}\n"
+    return stanza + ''.join(f"  {key}: {value}\n" for key, value in extra.items())
+
+
+def _pipeline(tmp_path, name: str, *tasks: str):
+    """Read a pipeline made from task stanzas."""
+    config = f"name: {name}\ntasks:\n" + ''.join(tasks)
+    return read_pipeline_config(str(tmp_path), str(tmp_path), str(tmp_path), config)
+
+
+def _run_pipeline(executor: Executor, pipe_id: str, tasks) -> None:
+    """Run a pipeline to the end on a new event loop, checking that it leaves nothing running."""
+
+    async def consume():
+        async for _ in executor.run(pipe_id, 'jid', '1', tasks):
+            pass
+
+    loop = asyncio.new_event_loop()
+    try:
+        try:
+            loop.run_until_complete(asyncio.wait_for(consume(), 10))
+        finally:
+            assert [task for task in asyncio.all_tasks(loop) if not task.done()] == []
+    finally:
+        loop.close()
+
+
+class FailingTaskManager(MockTaskManager):
+    """The `bad` task fails right away while `slow` would run for a long time."""
+
+    def __init__(self):
+        super().__init__()
+        self.killed = []
+
+    def status(self, handle: Handle) -> Dict:
+        if handle.name.endswith('--bad'):
+            return FailStatus("Failed", StatusType.FAILED, "bad failed")
+        return FailStatus("Succeeded", StatusType.SUCCEEDED, None)
+
+    def kill(self, handle: Handle) -> Dict:
+        self.killed.append(handle.name)
+
+    async def wait_for(self, handle: Handle) -> Dict:
+        if not handle.name.endswith('--bad'):
+            await asyncio.sleep(60)
+        return handle
+
+
+def test_failure_kills_siblings(tmp_path):
+    context, tasks = _pipeline(tmp_path, 'fail-job', _task('bad'), _task('slow'))
+    store = MemoryStore()
+    sched = FailingTaskManager()
+    pipe_id = context['PIPE_ID']
+    _run_pipeline(Executor(store, sched), pipe_id, tasks)
+    assert sched.killed == [f'{pipe_id}--slow']
+    assert store.get(pipe_id)[Store.STATUS] == 'TERMINATED'
+
+
+class DataflowTaskManager(MockTaskManager):
+    """The `slow` task only finishes once `after-fast` has been submitted."""
+
+    def __init__(self):
+        super().__init__()
+        self.submitted = []
+        self._after_fast = None
+
+    @property
+    def after_fast(self) -> asyncio.Event:
+        # The event has to be made inside of the loop that waits on it
+        if self._after_fast is None:
+            self._after_fast = asyncio.Event()
+        return self._after_fast
+
+    def submit(self, job: Task, **kwargs) -> Dict:
+        self.submitted.append(job.name)
+        if job.name.endswith('--after-fast'):
+            self.after_fast.set()
+        return {}
+
+    async def wait_for(self, handle: Handle) -> Dict:
+        if handle.name.endswith('--slow'):
+            await self.after_fast.wait()
+        return handle
+
+
+def test_children_start_before_unrelated_tasks_finish(tmp_path):
+    context, tasks = _pipeline(
+        tmp_path, 'dataflow-job', _task('fast'), _task('slow'), _task('after-fast', depends='fast')
+    )
+    store = MemoryStore()
+    sched = DataflowTaskManager()
+    pipe_id = context['PIPE_ID']
+    _run_pipeline(Executor(store, sched), pipe_id, tasks)
+    assert sched.submitted[-1] == f'{pipe_id}--after-fast'
+    status = store.get(pipe_id)
+    assert status[Store.STATUS] == 'DONE'
+    assert sorted(status[Store.EXECUTED]) == sorted(context['TASK_IDS'])
+    assert not status[Store.WAITING] and not status[Store.EXECUTING]
+
+
+class CachingTaskManager(MockTaskManager):
+    """Every task runs in the same container and finishes right away."""
+
+    def __init__(self):
+        super().__init__()
+        self.submitted = []
+
+    def submit(self, job: Task, **kwargs) -> Dict:
+        self.submitted.append(job.name)
+        return {}
+
+    async def wait_for(self, handle: Handle) -> Dict:
+        return handle
+
+    async def hash_task(self, task: Task):
+        return ['container']
+
+
+def test_cached_tasks_are_skipped(tmp_path):
+    (tmp_path / 'a.txt').write_text('a')
+    (tmp_path / 'b.txt').write_text('b')
+    stanzas = [_task(name, args=f'[{name}]', outputs=f"{{model: {tmp_path / f'{name}.txt'}}}") for name in 'ab']
+    store = MemoryStore()
+    p = Executor(store, CachingTaskManager())
+    context, tasks = _pipeline(tmp_path, 'cache-job', *stanzas)
+    _run_pipeline(p, context['PIPE_ID'], tasks)
+    # The second run finds the outputs of the first one in the cache
+    p.sched = CachingTaskManager()
+    context, tasks = _pipeline(tmp_path, 'cache-job', *stanzas)
+    _run_pipeline(p, context['PIPE_ID'], tasks)
+    assert not p.sched.submitted
+    status = store.get(context['PIPE_ID'])
+    assert status[Store.STATUS] == 'DONE'
+    assert sorted(status[Store.EXECUTED]) == sorted(context['TASK_IDS'])
+    assert not status[Store.EXECUTING]
+    for name in context['TASK_IDS']:
+        assert store.get(name)[Store.RESOURCE_ID] == Store.CACHED
+
+
+class SubmitFailingTaskManager(MockTaskManager):
+    """Submitting `bad` fails while `slow` is still running."""
+
+    def __init__(self):
+        super().__init__()
+        self.cancelled = []
+
+    def submit(self, job: Task, **kwargs) -> Dict:
+        if job.name.endswith('--bad'):
+            raise SubmitError("bad can't be scheduled")
+        return {}
+
+    async def wait_for(self, handle: Handle) -> Dict:
+        if handle.name.endswith('--slow'):
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                self.cancelled.append(handle.name)
+                raise
+        return handle
+
+
+def test_submit_error_cancels_running_waits(tmp_path):
+    context, tasks = _pipeline(
+        tmp_path, 'submit-fail-job', _task('slow'), _task('fast'), _task('bad', depends='fast')
+    )
+    store = MemoryStore()
+    sched = SubmitFailingTaskManager()
+    pipe_id = context['PIPE_ID']
+    with pytest.raises(SubmitError):
+        _run_pipeline(Executor(store, sched), pipe_id, tasks)
+    assert sched.cancelled == [f'{pipe_id}--slow']
+    assert store.get(pipe_id)[Store.STATUS] == 'TERMINATED'
@@ -0,0 +1,63 @@
+import asyncio
+from odin.serve import batch_lines
+
+
+async def _lines(n, delay_every=None):
+    for i in range(n):
+        if delay_every and i % delay_every == 0:
+            await asyncio.sleep(0.01)
+        yield str(i)
+
+
+def _collect(lines, max_lines):
+    async def collect():
+        return [batch async for batch in batch_lines(lines, max_lines)]
+
+    return asyncio.get_event_loop().run_until_complete(collect())
+
+
+def test_batch_lines_keeps_every_line_in_order():
+    batches = _collect(_lines(200), max_lines=64)
+    assert '\n'.join(batches).split('\n') == [str(i) for i in range(200)]
+    assert all(len(batch.split('\n')) <= 64 for batch in batches)
+
+
+def test_batch_lines_does_not_wait_for_a_full_batch():
+    batches = _collect(_lines(10, delay_every=5), max_lines=64)
+    assert '\n'.join(batches).split('\n') == [str(i) for i in range(10)]
+    assert len(batches) > 1
+
+
+def test_batch_lines_empty():
+    assert _collect(_lines(0), max_lines=64) == []
+
+
+def test_batch_lines_cleans_up_when_stopped_early():
+    closed = []
+
+    async def endless():
+        try:
+            i = 0
+            while True:
+                yield str(i)
+                i += 1
+                await asyncio.sleep(0)
+        finally:
+            closed.append(True)
+
+    async def stop_early():
+        batches = batch_lines(endless(), 4)
+        async for _ in batches:
+            break
+        # Let the producer fill the queue before closing
+        await asyncio.sleep(0.05)
+        await batches.aclose()
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    loop = asyncio.new_event_loop()
+    try:
+        pending = loop.run_until_complete(stop_early())
+    finally:
+        loop.close()
+    assert not pending
+    assert closed
@@ -0,0 +1,16 @@
+import pytest
+from odin.store import MemoryStore, Store
+
+
+def test_set_many():
+    store = MemoryStore()
+    store.set_many([{Store.PIPE_ID: 'a', 'x': 1}, {Store.PIPE_ID: 'b', 'x': 2}])
+    assert store.get('a')['x'] == 1
+    assert store.get('b')['x'] == 2
+
+
+def test_set_many_checks_every_entry_first():
+    store = MemoryStore()
+    with pytest.raises(ValueError, match=Store.PIPE_ID):
+        store.set_many([{Store.PIPE_ID: 'c'}, {'x': 3}])
+    assert not store.exists('c')